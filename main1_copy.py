@@ -5,13 +5,26 @@ Extracts tokens and cookies for specific APIs without saving files
 """
 
 import json
+import hashlib
+import re
 import time
 import os
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import random
+import shutil
+import signal
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, partial
+import requests
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
@@ -19,42 +32,435 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
-# Configure logging
+# Configure logging, the log file is only opened on the first record. main() moves these handlers behind
+# a queue listener so disk/console I/O stays off the hot path and worker processes share the one log file.
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('servicem8_extractor.log'),
+        logging.handlers.RotatingFileHandler('servicem8_extractor.log', maxBytes=5_000_000, backupCount=3, delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Queue feeding the parent's log listener, set by _start_log_listener and handed to pool workers
+_log_queue = None
+
+def _queue_handler(log_queue):
+    """Handler that only merges the message arguments, the listener's handlers add timestamp and level"""
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+def _start_log_listener():
+    """Serve the root handlers from a listener thread fed by a multiprocessing queue, returns the listener"""
+    global _log_queue
+    root = logging.getLogger()
+    _log_queue = multiprocessing.Queue(-1)
+    listener = logging.handlers.QueueListener(_log_queue, *root.handlers, respect_handler_level=True)
+    listener.start()
+    root.handlers = [_queue_handler(_log_queue)]
+    return listener
+
+def _stop_log_listener(listener):
+    """Flush the queue and give the root logger its handlers back for anything logged at exit"""
+    global _log_queue
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
+    _log_queue = None
+
+def _init_worker_logging(log_queue):
+    """Route a pool worker's records to the parent's listener instead of opening the log file again"""
+    logging.getLogger().handlers = [_queue_handler(log_queue)]
+
+# Direct Dispatch Board address, unset by default because the route has not been verified against the
+# live site; without it the board is opened through the main menu's job_dispatch link
+DISPATCH_URL = os.getenv("DISPATCH_URL")
+
+# Persistent Chrome profile and cookie jar so warm runs can skip the login form
+PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", os.path.join(os.getcwd(), "chrome_profile"))
+COOKIES_FILE = "servicem8_cookies.json"
+
+# Last extracted endpoints, reused without starting Chrome until they are TOKEN_CACHE_TTL seconds old.
+# s_auth values are opaque hex strings with no expiry claim and die with a revoked session, so the
+# cache is off unless TOKEN_CACHE_TTL is set to a lifetime observed for the account.
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "0"))
+TOKEN_CACHE_FILE = "token_cache.json" if TOKEN_CACHE_TTL > 0 else None
+TOKEN_CACHE_MARGIN = min(300, TOKEN_CACHE_TTL // 2)
+
+# Process ids of the Chrome holding the persistent profile, so the next run can reap it after a hard kill
+PID_FILE = os.getenv("CHROME_PID_FILE", os.path.join(tempfile.gettempdir(), "sm8_extractor.pid"))
+
+# Run Chrome headless unless HEADLESS=false, for when the site serves headless browsers a different page
+HEADLESS = os.getenv("HEADLESS", "true").lower() not in ("0", "false", "no")
+
+# ExtJS popup close-button selectors, built once instead of on every close_popup call.
+# Each group is one combined lookup, tried in priority order; XPath is kept only for text matches.
+_POPUP_SELECTORS = (
+    # Direct ID, class, and any element with x-tool-close class
+    (By.CSS_SELECTOR, "div#ext-gen17, div.x-tool.x-tool-close, .x-tool-close"),
+    # Tools inside a window header
+    (By.CSS_SELECTOR, ".x-window-header div.x-tool-close, .x-window-header div.x-tool"),
+    # Close button next to the "Updates" window title
+    (By.XPATH, "//span[contains(text(), 'Updates')]/../div[contains(@class, 'x-tool-close')]"
+               " | //*[contains(@class, 'x-window-header-text') and contains(text(), 'Updates')]/../div[contains(@class, 'x-tool-close')]")
+)
+
+# Assets token extraction never needs; CSS stays loaded because ExtJS needs layout for clicks
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3"
+]
+
+# Matches an s_auth token in a request URL, group 1 maps to the token key through _TOKEN_KEYS
+_TOKEN_URL_RE = re.compile(
+    r"(CalendarStoreRequest|PluginReminders_UpdateReminderForJobActivity|PluginReminders_SaveRecurringJobSchedule)"
+    r"[^'\"]*s_auth=([a-f0-9]+)"
+)
+
+# Hosts the reported endpoints live on, the Cookie header only carries cookies these would be sent
+_COOKIE_URLS = ["https://go.servicem8.com/", "https://ap-southeast-2.go.servicem8.com/"]
+
+# Tokens create_api_response needs for a complete result
+REQUIRED_TOKENS = frozenset({"CalendarStoreRequest", "UpdateReminderForJobActivity", "SaveRecurringJobSchedule"})
+
+_TOKEN_KEYS = {
+    "CalendarStoreRequest": "CalendarStoreRequest",
+    "PluginReminders_UpdateReminderForJobActivity": "UpdateReminderForJobActivity",
+    "PluginReminders_SaveRecurringJobSchedule": "SaveRecurringJobSchedule"
+}
+
+# JavaScript to find specific API URLs and tokens
+_EXTRACT_JS = r"""
+var apiData = [];
+var authTokens = {};
+var allUrls = [];
+var tokenKeys = {
+    'CalendarStoreRequest': 'CalendarStoreRequest',
+    'PluginReminders_UpdateReminderForJobActivity': 'UpdateReminderForJobActivity',
+    'PluginReminders_SaveRecurringJobSchedule': 'SaveRecurringJobSchedule'
+};
+
+// XHR/fetch URLs the page already requested, plus anything kept in web storage
+var sources = performance.getEntriesByType('resource').filter(function(entry) {
+    return entry.initiatorType === 'xmlhttprequest' || entry.initiatorType === 'fetch';
+}).map(function(entry) { return entry.name; });
+[window.localStorage, window.sessionStorage].forEach(function(store) {
+    try {
+        for (var k = 0; k < store.length; k++) {
+            sources.push(store.getItem(store.key(k)) || '');
+        }
+    } catch (e) {}
+});
+sources.forEach(function(text) {
+    var tokenRe = /(CalendarStoreRequest|PluginReminders_UpdateReminderForJobActivity|PluginReminders_SaveRecurringJobSchedule)[^'"]*s_auth=([a-f0-9]+)/g;
+    var match;
+    while ((match = tokenRe.exec(text)) !== null) {
+        authTokens[tokenKeys[match[1]]] = match[2];
+        allUrls.push(tokenKeys[match[1]]);
+    }
+});
+if (Object.keys(authTokens).length === 3) {
+    return {authTokens: authTokens, foundUrls: allUrls};
+}
+
+// Search all script tags
+var scripts = document.getElementsByTagName('script');
+for (var i = 0; i < scripts.length; i++) {
+    var scriptContent = scripts[i].innerHTML;
+    
+    // Look for CalendarStoreRequest
+    var calendarMatches = scriptContent.match(/CalendarStoreRequest[^'"]*s_auth=([a-f0-9]+)/g);
+    if (calendarMatches) {
+        calendarMatches.forEach(function(match) {
+            var authMatch = match.match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['CalendarStoreRequest'] = authMatch[1];
+                allUrls.push('CalendarStoreRequest');
+            }
+        });
+    }
+    
+    // Look for PluginReminders_UpdateReminderForJobActivity
+    var updateMatches = scriptContent.match(/PluginReminders_UpdateReminderForJobActivity[^'"]*s_auth=([a-f0-9]+)/g);
+    if (updateMatches) {
+        updateMatches.forEach(function(match) {
+            var authMatch = match.match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['UpdateReminderForJobActivity'] = authMatch[1];
+                allUrls.push('UpdateReminderForJobActivity');
+            }
+        });
+    }
+    
+    // Look for PluginReminders_SaveRecurringJobSchedule
+    var saveMatches = scriptContent.match(/PluginReminders_SaveRecurringJobSchedule[^'"]*s_auth=([a-f0-9]+)/g);
+    if (saveMatches) {
+        saveMatches.forEach(function(match) {
+            var authMatch = match.match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['SaveRecurringJobSchedule'] = authMatch[1];
+                allUrls.push('SaveRecurringJobSchedule');
+            }
+        });
+    }
+    
+    // Stop scanning once every token has been found
+    if (Object.keys(authTokens).length === 3) {
+        return {authTokens: authTokens, foundUrls: allUrls};
+    }
+}
+
+// Also search in window object
+for (var prop in window) {
+    if (typeof window[prop] === 'string' && window[prop].includes('s_auth=')) {
+        if (window[prop].includes('CalendarStoreRequest')) {
+            var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['CalendarStoreRequest'] = authMatch[1];
+            }
+        }
+        if (window[prop].includes('PluginReminders_UpdateReminderForJobActivity')) {
+            var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['UpdateReminderForJobActivity'] = authMatch[1];
+            }
+        }
+        if (window[prop].includes('PluginReminders_SaveRecurringJobSchedule')) {
+            var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
+            if (authMatch) {
+                authTokens['SaveRecurringJobSchedule'] = authMatch[1];
+            }
+        }
+    }
+}
+
+return {
+    authTokens: authTokens,
+    foundUrls: allUrls
+};
+"""
+
+# Shared HTTP session so responsiveness probes reuse TLS connections
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+@lru_cache(maxsize=8)
+def _probe_url(url):
+    """HEAD the url once per process; 405 still means the server is up"""
+    response = _http.head(url, timeout=3, allow_redirects=True)
+    return response.ok or response.status_code == 405
+
+def _write_json(path, data):
+    """Atomically write data as indented JSON, skipping the write when the content is unchanged"""
+    if orjson is not None:
+        buf = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(data, indent=2).encode()
+    
+    digest = hashlib.sha256(buf).hexdigest()
+    hash_path = f"{path}.sha256"
+    try:
+        with open(hash_path, "r") as f:
+            if f.read().strip() == digest and os.path.exists(path):
+                logger.info("%s unchanged, skipping write", path)
+                return False
+    except FileNotFoundError:
+        pass
+    
+    # Readers only ever see the old or the new file, never a partial one
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buf)
+    os.replace(tmp_path, path)
+    with open(hash_path, "w") as f:
+        f.write(digest)
+    return True
+
 class ServiceM8APIExtractor:
-    def __init__(self, max_retries=3):
+    # Chrome instance shared by every extractor in the process
+    _driver = None
+    # chromedriver pid this process wrote to PID_FILE, only that record may be removed on shutdown
+    _pid_file_pid = None
+    
+    def __init__(self, max_retries=3, email=None, password=None, user_data_dir=PROFILE_DIR, cookies_file=COOKIES_FILE,
+                 block_assets=True, token_cache_file=TOKEN_CACHE_FILE):
         self.driver = None
-        self.email = os.getenv("EMAIL")
-        self.password = os.getenv("PASSWORD")
+        self.email = email or os.getenv("EMAIL")
+        self.password = password or os.getenv("PASSWORD")
         self.max_retries = max_retries
+        self.user_data_dir = user_data_dir
+        self.cookies_file = cookies_file
+        self.block_assets = block_assets
+        self.token_cache_file = token_cache_file
+        self._token_buffer = {}
+        self._ready = False
+        self._on_dispatch = False
+        # Pooled HTTP session carrying the browser's cookies for calls to the extracted endpoints
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20))
         logger.info("ServiceM8APIExtractor initialized")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cleanup()
+        return False
+    
+    def _cleanup(self):
+        """Release the browser and HTTP connections held by this extractor"""
+        self.driver = None
+        self.http.close()
+        ServiceM8APIExtractor.shutdown()
+    
+    @classmethod
+    def extract_many(cls, credentials, max_retries=3, max_workers=None):
+        """Extract API data for several (email, password) pairs in parallel worker processes, keyed by email"""
+        if not credentials:
+            return {}
+        
+        # Each worker runs its own Chrome, so stay well below the core count
+        max_workers = max_workers or max(1, min(len(credentials), (os.cpu_count() or 2) // 2))
+        logger.info("Extracting %d accounts with %d worker processes", len(credentials), max_workers)
+        
+        results = {}
+        worker = partial(_worker, max_retries=max_retries)
+        # Workers log through the parent's listener when main() has started one
+        initializer, initargs = (_init_worker_logging, (_log_queue,)) if _log_queue is not None else (None, ())
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(worker, creds): creds[0] for creds in credentials}
+            for future in as_completed(futures):
+                email = futures[future]
+                try:
+                    results[email] = future.result()
+                except Exception as e:
+                    logger.error("Extraction failed for %s: %s", email, e)
+                    results[email] = None
+                logger.info("Finished extraction for %s (%d/%d)", email, len(results), len(credentials))
+        
+        return results
+        
+    @classmethod
+    def shutdown(cls):
+        """Quit the shared Chrome browser, call once at the end of the process"""
+        if cls._driver is None:
+            return
+        
+        # Collect Chrome processes before quitting, they are reparented once chromedriver exits
+        children = []
+        try:
+            import psutil
+            children = psutil.Process(cls._driver.service.process.pid).children(recursive=True)
+        except Exception as e:
+            logger.debug("Could not list chromedriver child processes: %s", e)
         
+        try:
+            logger.debug("Closing browser...")
+            cls._driver.quit()
+        except Exception as e:
+            logger.warning("Error closing browser: %s", e)
+        finally:
+            cls._driver = None
+        
+        # Kill any renderer that survived quit()
+        for child in children:
+            try:
+                if child.is_running():
+                    child.kill()
+            except Exception:
+                pass
+        
+        # Workers and throwaway-profile drivers never wrote the file, the record belongs to another process
+        if cls._pid_file_pid is not None:
+            try:
+                with open(PID_FILE, 'r') as f:
+                    if f.read().split()[:1] == [str(cls._pid_file_pid)]:
+                        os.remove(PID_FILE)
+            except OSError:
+                pass
+            cls._pid_file_pid = None
+    
+    @staticmethod
+    def _reap_stale_chrome():
+        """Kill a Chrome left behind by a previous run that never reached shutdown()"""
+        if not os.path.exists(PID_FILE):
+            return
+        try:
+            import psutil
+            with open(PID_FILE, 'r') as f:
+                pids = [int(pid) for pid in f.read().split()]
+            
+            for pid in pids:
+                try:
+                    process = psutil.Process(pid)
+                    if "chrome" in process.name().lower():
+                        process.kill()
+                        logger.info("Killed stale Chrome process %d", pid)
+                except psutil.NoSuchProcess:
+                    pass
+            os.remove(PID_FILE)
+        except Exception as e:
+            logger.debug("Could not reap stale Chrome processes: %s", e)
+    
+    def _write_pid_file(self):
+        """Record chromedriver and its Chrome processes for _reap_stale_chrome"""
+        try:
+            import psutil
+            driver_pid = self.driver.service.process.pid
+            pids = [driver_pid] + [child.pid for child in psutil.Process(driver_pid).children(recursive=True)]
+            with open(PID_FILE, 'w') as f:
+                f.write(" ".join(str(pid) for pid in pids))
+            ServiceM8APIExtractor._pid_file_pid = driver_pid
+        except Exception as e:
+            logger.debug("Could not write Chrome pid file: %s", e)
+    
     def setup_chrome(self):
         """Setup Chrome with retry mechanism for browser initialization failures"""
+        # Reuse the shared browser if it is still alive
+        cached = ServiceM8APIExtractor._driver
+        if cached is not None:
+            try:
+                if cached.service.is_connectable():
+                    self.driver = cached
+                    logger.info("Reusing existing Chrome browser")
+                    return True
+            except Exception as e:
+                logger.debug("Shared Chrome browser is not usable: %s", e)
+            ServiceM8APIExtractor.shutdown()
+        
+        # Only the persistent profile is shared between runs, worker profiles are removed on exit
+        persistent = self.user_data_dir == PROFILE_DIR
+        if persistent:
+            self._reap_stale_chrome()
+        
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Chrome browser setup attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Chrome browser setup attempt %d/%d", attempt + 1, self.max_retries)
                 
                 # Clean up any existing driver instance
                 if self.driver:
                     try:
                         self.driver.quit()
-                    except:
+                    except Exception:
                         pass
                     self.driver = None
+                    ServiceM8APIExtractor._driver = None
                 
                 options = Options()
+                # Return from driver.get at DOMContentLoaded, explicit waits cover the rest
+                options.page_load_strategy = "eager"
+                if HEADLESS:
+                    options.add_argument("--headless=new")
                 options.add_argument("--no-sandbox")
                 options.add_argument("--disable-dev-shm-usage")
                 options.add_argument("--disable-gpu")
@@ -62,6 +468,8 @@ class ServiceM8APIExtractor:
                 options.add_argument("--disable-blink-features=AutomationControlled")
                 options.add_experimental_option("excludeSwitches", ["enable-automation"])
                 options.add_experimental_option('useAutomationExtension', False)
+                # Expose DevTools network events so tokens can be read from outgoing requests
+                options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
                 options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
                 
                 # Additional stability options
@@ -74,23 +482,38 @@ class ServiceM8APIExtractor:
                 options.add_argument("--disable-backgrounding-occluded-windows")
                 options.add_argument("--disable-renderer-backgrounding")
                 
-                self.driver = webdriver.Chrome(options=options)
+                # Persistent profile keeps the session between runs; workers get their own to avoid collisions
+                if self.user_data_dir:
+                    options.add_argument(f"--user-data-dir={self.user_data_dir}")
+                    options.add_argument("--profile-directory=Default")
+                
+                self.driver = webdriver.Chrome(service=Service(), options=options, keep_alive=True)
+                ServiceM8APIExtractor._driver = self.driver
+                if persistent:
+                    self._write_pid_file()
+                
+                # Bound page loads and scripts instead of the 300s/30s defaults, rely on explicit waits only
+                self.driver.set_page_load_timeout(20)
+                self.driver.set_script_timeout(15)
+                self.driver.implicitly_wait(0)
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                 
+                self._prepare_target()
+                
                 # Test if browser is working
                 self.driver.get("about:blank")
                 logger.info("Chrome browser setup successful")
                 return True
                 
             except WebDriverException as e:
-                logger.error(f"WebDriver setup failed on attempt {attempt + 1}: {e}")
+                logger.error("WebDriver setup failed on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Unexpected error during Chrome setup attempt {attempt + 1}: {e}")
+                logger.error("Unexpected error during Chrome setup attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
@@ -99,21 +522,42 @@ class ServiceM8APIExtractor:
         
         return False
     
+    def _prepare_target(self):
+        """Enable network capture, asset blocking and the token extractor on the current tab"""
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        if self.block_assets:
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+        
+        # Install the token extractor once so V8 compiles it with each page instead of per call
+        self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": "window.__extractTokens = function() {" + _EXTRACT_JS + "};"
+        })
+    
+    def _wait_for(self, selector, timeout=15, condition=EC.presence_of_element_located):
+        """Wait until a CSS selector meets the condition, returns the element or None on timeout"""
+        try:
+            return WebDriverWait(self.driver, timeout).until(condition((By.CSS_SELECTOR, selector)))
+        except TimeoutException:
+            logger.debug("Timed out after %ss waiting for %s", timeout, selector)
+            return None
+    
+    def _on_dispatch_board(self, timeout=10):
+        """Check the Dispatch Board really rendered, an error page served at DISPATCH_URL has the URL but no app menu"""
+        return "dispatch" in self.driver.current_url.lower() and self._wait_for(".ThemeMainMenu", timeout=timeout) is not None
+    
     def check_website_responsiveness(self, url):
         """Check if website is responsive by making a simple request"""
         try:
-            import requests
-            response = requests.get(url, timeout=10)
-            return response.status_code == 200
+            return _probe_url(url)
         except Exception as e:
-            logger.warning(f"Website responsiveness check failed: {e}")
+            logger.warning("Website responsiveness check failed: %s", e)
             return False
 
     def load_website_with_retry(self, url, max_retries=3):
         """Load website with retry mechanism for loading failures"""
         for attempt in range(max_retries):
             try:
-                logger.info(f"Loading website attempt {attempt + 1}/{max_retries}: {url}")
+                logger.info("Loading website attempt %d/%d: %s", attempt + 1, max_retries, url)
                 
                 # Check website responsiveness first
                 if attempt == 0:  # Only check on first attempt
@@ -122,9 +566,9 @@ class ServiceM8APIExtractor:
                 
                 self.driver.get(url)
                 
-                # Wait for page to load completely
+                # Wait for the DOM to be parsed, subresources keep loading with the eager strategy
                 WebDriverWait(self.driver, 15).until(
-                    lambda driver: driver.execute_script("return document.readyState") == "complete"
+                    lambda driver: driver.execute_script("return document.readyState") != "loading"
                 )
                 
                 # Additional check for ServiceM8 specific elements
@@ -136,17 +580,17 @@ class ServiceM8APIExtractor:
                 # Verify page loaded correctly by checking title or URL
                 current_url = self.driver.current_url
                 if current_url and not current_url.startswith("data:"):
-                    logger.info(f"Website loaded successfully on attempt {attempt + 1}")
+                    logger.info("Website loaded successfully on attempt %d", attempt + 1)
                     return True
                 else:
-                    logger.warning(f"Website may not have loaded correctly - URL: {current_url}")
+                    logger.warning("Website may not have loaded correctly - URL: %s", current_url)
                     if attempt < max_retries - 1:
                         time.sleep(5)
                     else:
                         return False
                 
             except TimeoutException as e:
-                logger.warning(f"Website loading timeout on attempt {attempt + 1}: {e}")
+                logger.warning("Website loading timeout on attempt %d: %s", attempt + 1, e)
                 if attempt < max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
@@ -155,7 +599,7 @@ class ServiceM8APIExtractor:
                     return False
                     
             except Exception as e:
-                logger.warning(f"Website loading error on attempt {attempt + 1}: {e}")
+                logger.warning("Website loading error on attempt %d: %s", attempt + 1, e)
                 if attempt < max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
@@ -168,79 +612,136 @@ class ServiceM8APIExtractor:
     def close_popup(self):
         """Close popup if present"""
         try:
-            # Primary selectors for ExtJS close button based on the provided HTML
-            primary_selectors = [
-                "//div[@id='ext-gen17']",  # Direct ID selector
-                "//div[@class='x-tool x-tool-close']",  # Class selector
-                "//div[contains(@class, 'x-tool x-tool-close')]",  # Partial class match
-                "//*[contains(@class, 'x-tool-close')]"  # Any element with x-tool-close class
-            ]
-            
-            for selector in primary_selectors:
+            # find_elements returns [] on a miss instead of raising, which is the common case
+            for by, selector in _POPUP_SELECTORS:
+                elements = self.driver.find_elements(by, selector)
+                if not elements:
+                    continue
                 try:
-                    close_element = self.driver.find_element(By.XPATH, selector)
                     # Use ActionChains for more reliable clicking
                     action = ActionChains(self.driver)
-                    action.move_to_element(close_element).click().perform()
-                    logger.info(f"Popup closed successfully using selector: {selector}")
-                    time.sleep(2)
+                    action.move_to_element(elements[0]).click().perform()
+                    logger.info("Popup closed successfully using selector: %s", selector)
+                    try:
+                        WebDriverWait(self.driver, 2).until(EC.invisibility_of_element(elements[0]))
+                    except TimeoutException:
+                        pass
                     return True
                 except Exception as e:
-                    logger.debug(f"Selector {selector} failed: {e}")
-                    continue
-            
-            # Try CSS selector as well
-            try:
-                close_element = self.driver.find_element(By.CSS_SELECTOR, ".x-tool.x-tool-close")
-                action = ActionChains(self.driver)
-                action.move_to_element(close_element).click().perform()
-                logger.info("Popup closed successfully using CSS selector: .x-tool.x-tool-close")
-                time.sleep(2)
-                return True
-            except Exception as e:
-                logger.debug(f"CSS selector failed: {e}")
-            
-            # Fallback selectors
-            fallback_selectors = [
-                "//*[@id='ext-gen17']",
-                "//div[contains(@class, 'x-window-header')]//div[contains(@class, 'x-tool-close')]",
-                "//div[contains(@class, 'x-window-header')]//div[contains(@class, 'x-tool')]",
-                "//span[contains(text(), 'Updates')]/../div[contains(@class, 'x-tool-close')]",
-                "//*[contains(@class, 'x-window-header-text') and contains(text(), 'Updates')]/../div[contains(@class, 'x-tool-close')]"
-            ]
-            
-            for selector in fallback_selectors:
-                try:
-                    close_element = self.driver.find_element(By.XPATH, selector)
-                    action = ActionChains(self.driver)
-                    action.move_to_element(close_element).click().perform()
-                    logger.info(f"Popup closed successfully using fallback selector: {selector}")
-                    time.sleep(2)
-                    return True
-                except:
-                    continue
+                    logger.debug("Selector %s failed: %s", selector, e)
             
             # If no close button found, try pressing Escape key
             try:
                 self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
                 logger.info("Popup closed using Escape key")
-                time.sleep(2)
                 return True
-            except:
+            except Exception:
                 pass
                 
             logger.debug("No popup close button found")
             return False
             
         except Exception as e:
-            logger.debug(f"Failed to close popup: {e}")
+            logger.debug("Failed to close popup: %s", e)
             return False
 
+    def save_cookies(self):
+        """Save current session cookies so a cold profile can resume the session"""
+        if not self.cookies_file:
+            return False
+        try:
+            with open(self.cookies_file, 'w') as f:
+                json.dump(self.driver.get_cookies(), f, indent=2)
+            logger.info("Cookies saved to %s", self.cookies_file)
+            return True
+        except Exception as e:
+            logger.warning("Failed to save cookies: %s", e)
+            return False
+    
+    def load_cookies(self):
+        """Inject saved cookies with one CDP call, works before the first navigation"""
+        if not self.cookies_file or not os.path.exists(self.cookies_file):
+            return False
+        try:
+            with open(self.cookies_file, 'r') as f:
+                cookies = json.load(f)
+            
+            # CDP expects 'expires' where WebDriver uses 'expiry'
+            for cookie in cookies:
+                if 'expiry' in cookie:
+                    cookie['expires'] = cookie.pop('expiry')
+            
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            logger.info("Loaded %d cookies from %s", len(cookies), self.cookies_file)
+            return True
+        except Exception as e:
+            logger.warning("Failed to load cookies: %s", e)
+            return False
+    
+    def _load_cached(self):
+        """Return cached API data for this account if it stays valid past the safety margin"""
+        if not self.token_cache_file or not os.path.exists(self.token_cache_file):
+            return None
+        try:
+            with open(self.token_cache_file, 'r') as f:
+                cache = json.load(f)
+            
+            if cache.get("email") != self.email or cache["expires_at"] - time.time() <= TOKEN_CACHE_MARGIN:
+                return None
+            
+            logger.info("Using cached API data from %s", self.token_cache_file)
+            return cache["api_data"]
+        except Exception as e:
+            logger.warning("Failed to read token cache: %s", e)
+            return None
+    
+    def _save_cached(self, api_data):
+        """Write API data to the token cache atomically so readers never see a partial file"""
+        if not self.token_cache_file:
+            return False
+        try:
+            tmp_path = f"{self.token_cache_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    "email": self.email,
+                    "expires_at": time.time() + TOKEN_CACHE_TTL,
+                    "api_data": api_data
+                }, f)
+            os.replace(tmp_path, self.token_cache_file)
+            return True
+        except Exception as e:
+            logger.warning("Failed to write token cache: %s", e)
+            return False
+    
+    def resume_session(self):
+        """Open the app with the persisted session, returns False if a login is needed"""
+        self._on_dispatch = False
+        try:
+            self.load_cookies()
+            if not self.load_website_with_retry(DISPATCH_URL or "https://go.servicem8.com"):
+                return False
+            
+            current_url = self.driver.current_url.lower()
+            if "login" in current_url or self.driver.find_elements(By.ID, "user_email"):
+                logger.info("Saved session is not valid, fresh login required")
+                return False
+            
+            if self._wait_for(".ThemeMainMenu", timeout=10) is None:
+                return False
+            
+            # Only a configured DISPATCH_URL can land on the board, otherwise navigate_to_dispatch uses the menu
+            self._on_dispatch = bool(DISPATCH_URL) and "dispatch" in current_url
+            logger.info("Resumed saved session")
+            return True
+        except Exception as e:
+            logger.warning("Failed to resume saved session: %s", e)
+            return False
+    
     def login(self):
         """Login to ServiceM8 with retry mechanism"""
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Login attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Login attempt %d/%d", attempt + 1, self.max_retries)
                 
                 # Load website with retry
                 if not self.load_website_with_retry("https://go.servicem8.com"):
@@ -251,16 +752,19 @@ class ServiceM8APIExtractor:
                     else:
                         return False
                 
+                # A reused browser may still hold an authenticated session
+                if self.driver.find_elements(By.CLASS_NAME, "ThemeMainMenu"):
+                    logger.info("Already logged in - reusing existing session")
+                    return True
+                
                 # Close popup if present (try multiple times)
                 for popup_attempt in range(3):
                     if self.close_popup():
                         break
-                    time.sleep(1)
-                
-                wait = WebDriverWait(self.driver, 15)
-                wait.until(EC.presence_of_element_located((By.ID, "user_email")))
                 
-                email_field = self.driver.find_element(By.ID, "user_email")
+                email_field = self._wait_for("#user_email")
+                if email_field is None:
+                    raise TimeoutException("Login form did not appear")
                 email_field.clear()
                 
                 # Type email with keyword-like behavior
@@ -282,14 +786,15 @@ class ServiceM8APIExtractor:
                 action = ActionChains(self.driver)
                 action.move_to_element(submit_button).click().perform()
                 
-                time.sleep(5)
+                # Return as soon as the main menu renders instead of sleeping a fixed time
+                self._wait_for(".ThemeMainMenu")
                 
                 current_url = self.driver.current_url
                 if "login" not in current_url.lower() and "servicem8.com" in current_url:
                     logger.info("Login successful")
                     return True
                 else:
-                    logger.warning(f"Login failed on attempt {attempt + 1} - still on login page")
+                    logger.warning("Login failed on attempt %d - still on login page", attempt + 1)
                     if attempt < self.max_retries - 1:
                         logger.info("Waiting 5 seconds before retry...")
                         time.sleep(5)
@@ -297,19 +802,19 @@ class ServiceM8APIExtractor:
                         return False
                         
             except TimeoutException as e:
-                logger.error(f"Login timeout on attempt {attempt + 1}: {e}")
+                logger.error("Login timeout on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(5)
                 else:
                     return False
             except NoSuchElementException as e:
-                logger.error(f"Login element not found on attempt {attempt + 1}: {e}")
+                logger.error("Login element not found on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(5)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Login error on attempt {attempt + 1}: {e}")
+                logger.error("Login error on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(5)
                 else:
@@ -320,53 +825,44 @@ class ServiceM8APIExtractor:
     def remove_extjs_mask(self):
         """Remove ExtJS mask that blocks clicks"""
         try:
-            # Try to find and remove the mask
-            mask_selectors = [
-                "//div[@class='ext-el-mask']",
-                "//div[contains(@class, 'ext-el-mask')]",
-                "//div[@id='ext-gen20']",
-                "//*[contains(@class, 'x-mask')]"
-            ]
-            
-            for selector in mask_selectors:
-                try:
-                    mask_element = self.driver.find_element(By.XPATH, selector)
-                    # Hide the mask using JavaScript
-                    self.driver.execute_script("arguments[0].style.display = 'none';", mask_element)
-                    logger.info(f"ExtJS mask removed using selector: {selector}")
-                    time.sleep(1)
-                    return True
-                except:
-                    continue
-            
-            # Try to remove all masks using JavaScript
-            try:
-                self.driver.execute_script("""
-                    var masks = document.querySelectorAll('.ext-el-mask, .x-mask, [id*="ext-gen"]');
-                    for (var i = 0; i < masks.length; i++) {
-                        if (masks[i].style.zIndex > 1000) {
-                            masks[i].style.display = 'none';
-                        }
+            # Hide every mask in a single DOM sweep instead of one WebDriver lookup per selector.
+            # Generic ext-gen elements are only hidden when they sit on top of the page.
+            hidden = self.driver.execute_script("""
+                var hidden = 0;
+                var masks = document.querySelectorAll('.ext-el-mask, .x-mask, #ext-gen20, [id*="ext-gen"]');
+                for (var i = 0; i < masks.length; i++) {
+                    var el = masks[i];
+                    var isMask = el.matches('.ext-el-mask, .x-mask, #ext-gen20');
+                    if ((isMask || el.style.zIndex > 1000) && el.style.display !== 'none') {
+                        el.style.display = 'none';
+                        hidden++;
                     }
-                """)
-                logger.info("ExtJS masks removed using JavaScript")
-                time.sleep(1)
+                }
+                return hidden;
+            """)
+            
+            if hidden:
+                logger.info("ExtJS masks removed using JavaScript: %s", hidden)
                 return True
-            except:
-                pass
                 
             logger.debug("No ExtJS mask found to remove")
             return False
             
         except Exception as e:
-            logger.debug(f"Failed to remove ExtJS mask: {e}")
+            logger.debug("Failed to remove ExtJS mask: %s", e)
             return False
 
-    def navigate_to_dispatch(self):
-        """Navigate to Dispatch Board with retry mechanism"""
+    def navigate_to_dispatch(self, use_menu=False):
+        """Navigate to Dispatch Board through the main menu with retry mechanism, or by DISPATCH_URL when set"""
+        if DISPATCH_URL and not use_menu:
+            if self.load_website_with_retry(DISPATCH_URL) and self._on_dispatch_board():
+                logger.info("Successfully navigated to Dispatch Board via direct URL")
+                return True
+            logger.warning("Direct Dispatch Board navigation failed, falling back to main menu")
+        
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Navigation to Dispatch Board attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Navigation to Dispatch Board attempt %d/%d", attempt + 1, self.max_retries)
                 wait = WebDriverWait(self.driver, 10)
                 
                 # Remove any ExtJS masks that might block clicks
@@ -376,7 +872,7 @@ class ServiceM8APIExtractor:
                 nav_menu = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "ThemeMainMenu")))
                 
                 # Wait for dispatch link to be clickable
-                dispatch_link = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, 'job_dispatch')]")))
+                dispatch_link = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='job_dispatch']")))
                 
                 # Human-like mouse movement to the dispatch link
                 action = ActionChains(self.driver)
@@ -398,13 +894,13 @@ class ServiceM8APIExtractor:
                     dispatch_link.click()
                     logger.info("Dispatch link clicked successfully")
                 except Exception as click_error:
-                    logger.warning(f"Regular click failed: {click_error}")
+                    logger.warning("Regular click failed: %s", click_error)
                     try:
                         # Strategy 2: JavaScript click
                         self.driver.execute_script("arguments[0].click();", dispatch_link)
                         logger.info("Dispatch link clicked using JavaScript")
                     except Exception as js_error:
-                        logger.warning(f"JavaScript click failed: {js_error}")
+                        logger.warning("JavaScript click failed: %s", js_error)
                         try:
                             # Strategy 3: ActionChains click with human-like movement
                             action.move_to_element_with_offset(dispatch_link, random.randint(-5, 5), random.randint(-5, 5)).perform()
@@ -412,12 +908,15 @@ class ServiceM8APIExtractor:
                             action.click().perform()
                             logger.info("Dispatch link clicked using ActionChains with human-like movement")
                         except Exception as action_error:
-                            logger.error(f"All click strategies failed: {action_error}")
+                            logger.error("All click strategies failed: %s", action_error)
                             raise action_error
                 
-                # Wait for page to load
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(10)
+                # Wait for the Dispatch Board route to load
+                try:
+                    WebDriverWait(self.driver, 15).until(EC.url_contains("dispatch"))
+                except TimeoutException:
+                    logger.debug("Timed out waiting for the Dispatch Board URL")
+                self._wait_for("body")
                 
                 # Verify we're on the dispatch page
                 current_url = self.driver.current_url
@@ -425,7 +924,7 @@ class ServiceM8APIExtractor:
                     logger.info("Successfully navigated to Dispatch Board")
                     return True
                 else:
-                    logger.warning(f"Navigation may have failed - URL doesn't contain dispatch: {current_url}")
+                    logger.warning("Navigation may have failed - URL doesn't contain dispatch: %s", current_url)
                     if attempt < self.max_retries - 1:
                         logger.info("Waiting 5 seconds before retry...")
                         time.sleep(5)
@@ -434,21 +933,21 @@ class ServiceM8APIExtractor:
                         return True  # Still return True as we may have reached the page
                 
             except TimeoutException as e:
-                logger.error(f"Navigation timeout on attempt {attempt + 1}: {e}")
+                logger.error("Navigation timeout on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
                 else:
                     return False
             except NoSuchElementException as e:
-                logger.error(f"Navigation element not found on attempt {attempt + 1}: {e}")
+                logger.error("Navigation element not found on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Navigation error on attempt {attempt + 1}: {e}")
+                logger.error("Navigation error on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     logger.info("Waiting 5 seconds before retry...")
                     time.sleep(5)
@@ -458,142 +957,117 @@ class ServiceM8APIExtractor:
         return False
     
     def extract_with_retry(self):
-        """Extract API data with retry logic if no tokens found"""
+        """Extract API data with retry logic until every required token is found"""
+        best_tokens, best_cookie_string = {}, ""
+        
+        # Scan straight away, only wait on network traffic when the scan comes up short
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Token extraction attempt {attempt + 1}/{self.max_retries}")
+                logger.debug("Token extraction attempt %d/%d", attempt + 1, self.max_retries)
                 
                 # Extract API data
                 auth_tokens, cookie_string = self.extract_api_data()
+                if len(auth_tokens) > len(best_tokens):
+                    best_tokens, best_cookie_string = auth_tokens, cookie_string
                 
-                # Check if we found any tokens
-                if auth_tokens:
-                    logger.info(f"Successfully found {len(auth_tokens)} tokens on attempt {attempt + 1}")
+                # Check if we found all tokens
+                if REQUIRED_TOKENS.issubset(auth_tokens):
+                    logger.info("Successfully found %d tokens on attempt %d", len(auth_tokens), attempt + 1)
                     return auth_tokens, cookie_string
                 else:
-                    logger.warning(f"No tokens found on attempt {attempt + 1}")
+                    missing = sorted(REQUIRED_TOKENS.difference(auth_tokens))
+                    logger.warning("Missing tokens on attempt %d: %s", attempt + 1, missing)
                     
                     # If not the last attempt, wait and try again
-                    if attempt < self.max_retries - 1:
-                        logger.info(f"Waiting 5 seconds before retry...")
-                        time.sleep(5)
-                        
-                        # Try refreshing the page
+                    if attempt < self.max_retries - 2:
+                        # Rescan the same page, lazy modules often just need a nudge to send their requests
+                        logger.info("Waiting for network requests before rescanning the page...")
+                        try:
+                            self.driver.execute_script("window.dispatchEvent(new Event('focus'));")
+                        except Exception as e:
+                            logger.debug("Failed to dispatch focus event: %s", e)
+                        self.wait_for_network_tokens(timeout=5)
+                    elif attempt < self.max_retries - 1:
+                        # Only reload the page before the final attempt
                         try:
                             self.driver.refresh()
-                            time.sleep(3)
+                            self._wait_for(".ThemeMainMenu", timeout=10)
                             logger.info("Page refreshed for retry")
                         except Exception as e:
-                            logger.warning(f"Failed to refresh page: {e}")
+                            logger.warning("Failed to refresh page: %s", e)
                     
             except Exception as e:
-                logger.error(f"Error during token extraction attempt {attempt + 1}: {e}")
+                logger.error("Error during token extraction attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(5)
         
+        if best_tokens:
+            logger.warning("Returning %d of %d tokens after all retry attempts", len(best_tokens), len(REQUIRED_TOKENS))
+            return best_tokens, best_cookie_string
+        
         logger.error("Failed to extract tokens after all retry attempts")
         return {}, ""
     
+    def collect_network_tokens(self):
+        """Collect s_auth tokens from requests the page has sent since the last call"""
+        try:
+            for entry in self.driver.get_log("performance"):
+                message = json.loads(entry["message"])["message"]
+                if message.get("method") != "Network.requestWillBeSent":
+                    continue
+                
+                url = message["params"]["request"]["url"]
+                for match in _TOKEN_URL_RE.finditer(url):
+                    self._token_buffer[_TOKEN_KEYS[match.group(1)]] = match.group(2)
+        except Exception as e:
+            logger.debug("Failed to read network events: %s", e)
+        
+        return self._token_buffer
+    
+    def wait_for_network_tokens(self, timeout=15, poll_interval=0.25):
+        """Drain network events until every required token has been seen or the timeout passes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            tokens = self.collect_network_tokens()
+            if REQUIRED_TOKENS.issubset(tokens) or time.monotonic() >= deadline:
+                return tokens
+            time.sleep(poll_interval)
+    
+    def _cookie_header(self):
+        """Build the Cookie header in one round-trip; CDP also sees the HttpOnly cookies document.cookie hides"""
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getCookies", {"urls": _COOKIE_URLS})["cookies"]
+        except WebDriverException as e:
+            logger.debug("CDP cookie read failed, falling back to document.cookie: %s", e)
+            return self.driver.execute_script("return document.cookie")
+        
+        for c in cookies:
+            self.http.cookies.set(c['name'], c['value'], domain=c['domain'], path=c.get('path', '/'))
+        return "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+    
     def extract_api_data(self):
         """Extract API tokens and cookies for specific URLs"""
         try:
-            logger.info("Extracting API data...")
-            # JavaScript to find specific API URLs and tokens
-            js_code = """
-            var apiData = [];
-            var authTokens = {};
-            var allUrls = [];
-            
-            // Search all script tags
-            var scripts = document.getElementsByTagName('script');
-            for (var i = 0; i < scripts.length; i++) {
-                var scriptContent = scripts[i].innerHTML;
-                
-                // Look for CalendarStoreRequest
-                var calendarMatches = scriptContent.match(/CalendarStoreRequest[^'"]*s_auth=([a-f0-9]+)/g);
-                if (calendarMatches) {
-                    calendarMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['CalendarStoreRequest'] = authMatch[1];
-                            allUrls.push('CalendarStoreRequest');
-                        }
-                    });
-                }
-                
-                // Look for PluginReminders_UpdateReminderForJobActivity
-                var updateMatches = scriptContent.match(/PluginReminders_UpdateReminderForJobActivity[^'"]*s_auth=([a-f0-9]+)/g);
-                if (updateMatches) {
-                    updateMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['UpdateReminderForJobActivity'] = authMatch[1];
-                            allUrls.push('UpdateReminderForJobActivity');
-                        }
-                    });
-                }
-                
-                // Look for PluginReminders_SaveRecurringJobSchedule
-                var saveMatches = scriptContent.match(/PluginReminders_SaveRecurringJobSchedule[^'"]*s_auth=([a-f0-9]+)/g);
-                if (saveMatches) {
-                    saveMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['SaveRecurringJobSchedule'] = authMatch[1];
-                            allUrls.push('SaveRecurringJobSchedule');
-                        }
-                    });
-                }
-            }
+            logger.debug("Extracting API data...")
+            # Call the extractor installed on every page by setup_chrome, fall back to shipping it
+            result = self.driver.execute_script("return window.__extractTokens ? window.__extractTokens() : null;")
+            if result is None:
+                result = self.driver.execute_script(_EXTRACT_JS)
             
-            // Also search in window object
-            for (var prop in window) {
-                if (typeof window[prop] === 'string' && window[prop].includes('s_auth=')) {
-                    if (window[prop].includes('CalendarStoreRequest')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['CalendarStoreRequest'] = authMatch[1];
-                        }
-                    }
-                    if (window[prop].includes('PluginReminders_UpdateReminderForJobActivity')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['UpdateReminderForJobActivity'] = authMatch[1];
-                        }
-                    }
-                    if (window[prop].includes('PluginReminders_SaveRecurringJobSchedule')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['SaveRecurringJobSchedule'] = authMatch[1];
-                        }
-                    }
-                }
-            }
-            
-            return {
-                authTokens: authTokens,
-                foundUrls: allUrls
-            };
-            """
-            
-            result = self.driver.execute_script(js_code)
+            # Tokens seen in live network traffic take precedence over the script scan
+            auth_tokens = dict(result['authTokens'])
+            auth_tokens.update(self.collect_network_tokens())
             
-            # Get cookies
-            all_cookies = self.driver.get_cookies()
-            cookie_string = ""
-            for cookie in all_cookies:
-                if cookie_string:
-                    cookie_string += "; "
-                cookie_string += f"{cookie['name']}={cookie['value']}"
+            cookie_string = self._cookie_header()
             
-            logger.info(f"Found {len(result['authTokens'])} auth tokens: {list(result['authTokens'].keys())}")
-            return result['authTokens'], cookie_string
+            logger.info("Found %d auth tokens: %s", len(auth_tokens), list(auth_tokens.keys()))
+            return auth_tokens, cookie_string
             
         except WebDriverException as e:
-            logger.error(f"WebDriver error during API data extraction: {e}")
+            logger.error("WebDriver error during API data extraction: %s", e)
             return {}, ""
         except Exception as e:
-            logger.error(f"Error extracting API data: {e}")
+            logger.error("Error extracting API data: %s", e)
             return {}, ""
     
     def create_api_response(self, auth_tokens, cookie_string):
@@ -626,94 +1100,235 @@ class ServiceM8APIExtractor:
         
         return api_data
     
-    def extract(self):
-        """Main extraction method with comprehensive error handling"""
+    def ensure_session(self):
+        """Start Chrome and log in once, later calls reuse the same browser session"""
+        if self._ready:
+            return True
+        
+        # Setup Chrome
+        if not self.setup_chrome():
+            logger.error("Failed to setup Chrome browser")
+            return False
+        
+        # Reuse the persisted session when possible, with DISPATCH_URL set it lands directly on the board
+        resumed = self.resume_session()
+        
+        # Login
+        if not resumed and not self.login():
+            logger.error("Failed to login to ServiceM8")
+            return False
+        
+        self._ready = True
+        return True
+    
+    def extract_once(self, use_cache=True):
+        """Extract API data using the current session, logging in first if needed"""
+        _info, _warn, _error = logger.info, logger.warning, logger.error
         try:
-            logger.info("Starting ServiceM8 API extraction process...")
+            _info("Starting ServiceM8 API extraction process...")
             
-            # Setup Chrome
-            if not self.setup_chrome():
-                logger.error("Failed to setup Chrome browser")
-                return None
+            # Fresh cached tokens make the browser unnecessary
+            cached = self._load_cached() if use_cache else None
+            if cached:
+                return cached
             
-            # Login
-            if not self.login():
-                logger.error("Failed to login to ServiceM8")
+            if not self.ensure_session():
                 return None
             
-            # Navigate to Dispatch Board
-            if not self.navigate_to_dispatch():
-                logger.error("Failed to navigate to Dispatch Board")
+            # Only count tokens from requests sent during this run
+            self._token_buffer.clear()
+            
+            # Navigate to Dispatch Board, unless resume_session has just opened it
+            if not self._on_dispatch and not self.navigate_to_dispatch():
+                _error("Failed to navigate to Dispatch Board")
+                # The session may have expired, log in again on the next call
+                self._ready = False
                 return None
+            self._on_dispatch = False
             
             # Extract API data with retry logic
             auth_tokens, cookie_string = self.extract_with_retry()
             
             if not auth_tokens:
-                logger.error("No auth tokens found after all retry attempts")
+                _error("No auth tokens found after all retry attempts")
                 return None
             
             # Create response
             api_data = self.create_api_response(auth_tokens, cookie_string)
             
             if api_data:
-                logger.info(f"Successfully extracted {len(api_data)} API endpoints")
+                _info("Successfully extracted %d API endpoints", len(api_data))
+                self.save_cookies()
+                # A partial result must not stop the next run from retrying in Chrome
+                if REQUIRED_TOKENS.issubset(auth_tokens):
+                    self._save_cached(api_data)
             else:
-                logger.warning("No API data created from extracted tokens")
+                _warn("No API data created from extracted tokens")
             
             return api_data
             
         except Exception as e:
-            logger.error(f"Critical error in extraction process: {e}")
+            _error("Critical error in extraction process: %s", e)
             return None
-        finally:
-            if self.driver:
+    
+    def extract(self):
+        """Main extraction method with comprehensive error handling"""
+        return self.extract_once()
+    
+    def _logout(self):
+        """Drop every cookie and the ServiceM8 origins' storage so the next login starts from scratch"""
+        self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for url in _COOKIE_URLS:
+            self.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": url.rstrip("/"), "storageTypes": "all"})
+        self._token_buffer.clear()
+        self._ready = False
+    
+    def extract_in_shared_browser(self, credentials):
+        """Extract several accounts one after another in the shared Chrome, logging out in between, keyed by email"""
+        if not self.setup_chrome():
+            logger.error("Failed to setup Chrome browser")
+            return {}
+        
+        own_email, own_password = self.email, self.password
+        results = {}
+        try:
+            for email, password in credentials:
+                # A leftover session would be extracted under the wrong account, so a failed logout aborts the batch
+                self._logout()
+                
+                self.email, self.password = email, password
+                results[email] = None
                 try:
-                    logger.info("Closing browser...")
-                    self.driver.quit()
+                    if self.login() and self.navigate_to_dispatch():
+                        auth_tokens, cookie_string = self.extract_with_retry()
+                        if auth_tokens:
+                            results[email] = self.create_api_response(auth_tokens, cookie_string)
+                    if results[email] is None:
+                        logger.error("Extraction failed for %s", email)
                 except Exception as e:
-                    logger.warning(f"Error closing browser: {e}")
+                    logger.error("Extraction failed for %s: %s", email, e)
+                logger.info("Finished extraction for %s (%d/%d)", email, len(results), len(credentials))
+        finally:
+            # The browser's session belongs to the last account of the batch, not the configured one
+            self.email, self.password = own_email, own_password
+            try:
+                self._logout()
+            except Exception as e:
+                logger.warning("Failed to log out after the batch: %s", e)
+        
+        return results
+
+def _worker(credentials, max_retries=3):
+    """Run a single extraction in a worker process with its own Chrome profile"""
+    email, password = credentials
+    user_data_dir = tempfile.mkdtemp(prefix=f"chrome-{os.getpid()}-")
+    try:
+        with ServiceM8APIExtractor(max_retries=max_retries, email=email, password=password,
+                                   user_data_dir=user_data_dir, cookies_file=None,
+                                   token_cache_file=None) as extractor:
+            return extractor.extract()
+    finally:
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+
+def _load_credentials():
+    """Read (email, password) pairs from the ACCOUNTS_FILE JSON list, falling back to EMAIL/PASSWORD"""
+    accounts_file = os.getenv("ACCOUNTS_FILE")
+    if accounts_file and os.path.exists(accounts_file):
+        with open(accounts_file, 'r') as f:
+            return [(account["email"], account["password"]) for account in json.load(f)]
+    
+    email = os.getenv("EMAIL")
+    password = os.getenv("PASSWORD")
+    return [(email, password)] if email and password else []
+
+def _handle_sigterm(signum, frame):
+    """Turn SIGTERM into a normal exit so shutdown() and the atexit hooks run"""
+    raise SystemExit(128 + signum)
+
+# Make sure chromedriver and Chrome never outlive the interpreter
+atexit.register(ServiceM8APIExtractor.shutdown)
 
 def main():
     """Main function with comprehensive error handling"""
+    _debug, _info, _error = logger.debug, logger.info, logger.error
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    log_listener = _start_log_listener()
     try:
-        logger.info("Starting ServiceM8 API Token Extractor...")
+        _info("Starting ServiceM8 API Token Extractor...")
         
         # Check environment variables
-        email = os.getenv("EMAIL")
-        password = os.getenv("PASSWORD")
+        credentials = _load_credentials()
         
-        if not email or not password:
-            logger.error("EMAIL and PASSWORD environment variables not found!")
-            logger.error("Please create a .env file with your ServiceM8 credentials")
+        if not credentials:
+            _error("EMAIL and PASSWORD environment variables not found!")
+            _error("Please create a .env file with your ServiceM8 credentials")
             return
         
-        logger.info("Environment variables loaded successfully")
+        _debug("Environment variables loaded successfully")
+        
+        # Several accounts run in parallel, one Chrome per worker process
+        if len(credentials) > 1:
+            if os.getenv("PARALLEL_MODE", "processes") in ("shared", "tabs"):
+                # One Chrome for every account in turn: far less memory than a browser per worker.
+                # A throwaway profile keeps the batch's logouts out of the persistent one.
+                user_data_dir = tempfile.mkdtemp(prefix="chrome-shared-")
+                try:
+                    with ServiceM8APIExtractor(max_retries=3, user_data_dir=user_data_dir, cookies_file=None,
+                                               token_cache_file=None) as extractor:
+                        results = extractor.extract_in_shared_browser(credentials)
+                finally:
+                    shutil.rmtree(user_data_dir, ignore_errors=True)
+            else:
+                results = ServiceM8APIExtractor.extract_many(
+                    credentials, max_workers=int(os.getenv("MAX_WORKERS", "0")) or None
+                )
+            # Keep the single-account list schema, each endpoint is tagged with the account it belongs to
+            result = [dict(entry, email=email) for email, api_data in results.items() for entry in api_data or ()]
+            try:
+                if _write_json("result.json", result):
+                    _info("Results saved to result.json")
+            except Exception as e:
+                _error("Failed to save results to file: %s", e)
+            
+            failed = [email for email, api_data in results.items() if not api_data]
+            if failed:
+                _error("Extraction failed for %d/%d accounts: %s", len(failed), len(credentials), failed)
+            _info("Extraction completed for %d/%d accounts, %d API endpoints",
+                  len(credentials) - len(failed), len(credentials), len(result))
+            return
+        
+        # Number of extractions to run with the same browser session
+        runs = int(os.getenv("EXTRACT_RUNS", "1"))
         
         # Run extraction
-        extractor = ServiceM8APIExtractor(max_retries=3)
-        result = extractor.extract()
+        with ServiceM8APIExtractor(max_retries=3) as extractor:
+            for run in range(runs):
+                if runs > 1:
+                    _info("Extraction run %d/%d", run + 1, runs)
+                # Repeat runs exist to re-extract, only the first may be answered from the cache
+                result = extractor.extract_once(use_cache=run == 0)
 
-        # Store result in json file
-        try:
-            with open("result.json", "w") as f:
-                json.dump(result, f, indent=3)
-            logger.info("Results saved to result.json")
-        except Exception as e:
-            logger.error(f"Failed to save results to file: {e}")
-        
-        if result:
-            logger.info("Extraction completed successfully!")
-            logger.info(f"Found {len(result)} API endpoints")
-            # Uncomment the next line if you want to print results to console
-            # print(json.dumps(result, indent=2))
-        else:
-            logger.error("Extraction failed - no data retrieved")
+                # Store result in json file
+                try:
+                    if _write_json("result.json", result):
+                        _info("Results saved to result.json")
+                except Exception as e:
+                    _error("Failed to save results to file: %s", e)
+                
+                if result:
+                    _info("Extraction completed successfully!")
+                    _info("Found %d API endpoints", len(result))
+                    # Uncomment the next line if you want to print results to console
+                    # print(json.dumps(result, indent=2))
+                else:
+                    _error("Extraction failed - no data retrieved")
             
     except Exception as e:
-        logger.error(f"Critical error in main function: {e}")
+        _error("Critical error in main function: %s", e)
     finally:
-        logger.info("ServiceM8 API Token Extractor finished")
+        ServiceM8APIExtractor.shutdown()
+        _info("ServiceM8 API Token Extractor finished")
+        _stop_log_listener(log_listener)
 
 if __name__ == "__main__":
     main()
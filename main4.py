@@ -5,12 +5,17 @@ Extracts tokens and cookies for specific APIs without saving files
 """
 
 import json
+import random
+import re
 import time
 import os
 import logging
-import tempfile
+import logging.handlers
+import multiprocessing
 import shutil
-import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -21,30 +26,269 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 load_dotenv()
 
-# Configure logging
+# Configure logging, the log file is only opened on the first record; LOG_LEVEL=WARNING skips INFO formatting
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('servicem8_extractor.log'),
+        logging.handlers.RotatingFileHandler('servicem8_extractor.log', maxBytes=5_000_000, backupCount=3, delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+def _sleep_backoff(attempt, base=0.5, cap=8):
+    """Sleep before a retry with capped exponential backoff and full jitter"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    logger.info("Waiting %.1f seconds before retry...", delay)
+    time.sleep(delay)
+
+# Runs responsiveness probes alongside the browser navigation
+_probe_executor = ThreadPoolExecutor(max_workers=2)
+
+# Host the app is served from, saved cookies without a domain belong to it
+SITE_HOST = "go.servicem8.com"
+
+# Browserless login and Dispatch Board scan, opt-in with HTTP_EXTRACT=true until the form endpoint
+# and field names below are confirmed against the live site
+HTTP_EXTRACT = os.getenv("HTTP_EXTRACT", "false").lower() in ("1", "true", "yes")
+LOGIN_URL = os.getenv("LOGIN_URL", "https://go.servicem8.com/login")
+DISPATCH_URL = os.getenv("DISPATCH_URL", "https://go.servicem8.com/job_dispatch")
+
+# Hidden login form fields such as the CSRF token, posted back along with the credentials
+_HIDDEN_INPUT_RE = re.compile(r'<input[^>]*type=["\']hidden["\'][^>]*>', re.IGNORECASE)
+_INPUT_ATTR_RE = re.compile(r'(name|value)=["\']([^"\']*)["\']', re.IGNORECASE)
+
+# Run Chrome headless unless HEADLESS=false, e.g. to watch a local run
+HEADLESS = os.getenv("HEADLESS", "true").lower() not in ("0", "false", "no")
+
+# Persistent Chrome profile, the browser reloads its own cookie jar from it on startup
+PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", os.path.join(os.getcwd(), "chrome_profile"))
+
+# Assets token extraction never needs; CSS stays loaded because the menu click needs ExtJS layout
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm", "*.mp3"
+]
+
+# Matches an s_auth token in a request URL, group 1 maps to the token key through _TOKEN_KEYS
+_TOKEN_RE = re.compile(
+    r"(CalendarStoreRequest|PluginReminders_UpdateReminderForJobActivity|PluginReminders_SaveRecurringJobSchedule)"
+    r"[^'\"]{0,512}s_auth=([a-f0-9]+)"
+)
+
+_TOKEN_KEYS = {
+    "CalendarStoreRequest": "CalendarStoreRequest",
+    "PluginReminders_UpdateReminderForJobActivity": "UpdateReminderForJobActivity",
+    "PluginReminders_SaveRecurringJobSchedule": "SaveRecurringJobSchedule"
+}
+
+# API endpoints reported for each token key, in response order, each URL is the prefix plus the s_auth token
+_ENDPOINTS = (
+    ("CalendarStoreRequest",
+     "https://go.servicem8.com/CalendarStoreRequest?s_cv=&s_form_values=query-start-limit-_dc-callback-records-xaction-end-id-strJobUUID&s_auth="),
+    ("UpdateReminderForJobActivity",
+     "https://ap-southeast-2.go.servicem8.com/PluginReminders_UpdateReminderForJobActivity?s_form_values=strReminderUUID-strOriginalStartDate-strOriginalEndDate-strOriginalStaffUUID-strNewStartDate-strNewEndDate-strNewStaffUUID-strNewStaffUUIDList-boolModifyAllFollowingRecurrences&s_auth="),
+    ("SaveRecurringJobSchedule",
+     "https://ap-southeast-2.go.servicem8.com/PluginReminders_SaveRecurringJobSchedule?s_form_values=strReminderUUID-strCustomerUUID-strJobTemplateUUID-strAlertMode-strAllocationWindowUUID-strScheduledStartTime-intScheduledDuration-strStaffUUID-strStaffUUIDList-strAlertDescription-strRecurrenceType-strDailyMode-strWeeklyMode-strMonthlyMode-strYearlyMode-intDailyInterval-intWeeklyInterval-intWeeklyWeeksAfterCompletion-arrWeeklyDayNames-intMonthlyDayEveryMonth-intMonthlyDayEveryMonthInterval-strMonthlyMode2WeekType-intMonthlyMode2DayName-intMonthlyMode2MonthInterval-strYearlyMode2WeekType-intYearlyMode1Month-intYearlyMode1Day-intYearlyMode2DayName-intYearlyMode2Month-strPatternStartDate-strPatternEndDateMode-strPatternEndDate-intPatternEndDateOccurrences-boolCancelReminder&s_auth="),
+)
+
+# Tokens a result needs to be complete, a partial HTTP scan falls through to the browser
+REQUIRED_TOKENS = frozenset(key for key, _ in _ENDPOINTS)
+
+# JavaScript to find specific API URLs and tokens, one regex pass over all script text
+_EXTRACT_JS = r"""
+var authTokens = {};
+var allUrls = [];
+var tokenKeys = {
+    'CalendarStoreRequest': 'CalendarStoreRequest',
+    'PluginReminders_UpdateReminderForJobActivity': 'UpdateReminderForJobActivity',
+    'PluginReminders_SaveRecurringJobSchedule': 'SaveRecurringJobSchedule'
+};
+var tokenRe = /(CalendarStoreRequest|PluginReminders_UpdateReminderForJobActivity|PluginReminders_SaveRecurringJobSchedule)[^'"\x00]{0,512}s_auth=([a-f0-9]+)/g;
+
+function scan(text) {
+    var match;
+    tokenRe.lastIndex = 0;
+    while ((match = tokenRe.exec(text)) !== null) {
+        authTokens[tokenKeys[match[1]]] = match[2];
+        allUrls.push(tokenKeys[match[1]]);
+    }
+}
+
+// Search all script tags plus a few known globals at once,
+// NUL-separated so a match cannot span two sources
+var scripts = document.scripts;
+var bodies = [];
+for (var i = 0; i < scripts.length; i++) {
+    bodies.push(scripts[i].text);
+}
+['s_auth', '__INITIAL_STATE__', 'APP_CONFIG'].forEach(function(k) {
+    if (typeof window[k] === 'string') {
+        bodies.push(window[k]);
+    }
+});
+scan(bodies.join('\x00'));
+
+return {
+    authTokens: authTokens,
+    foundUrls: allUrls
+};
+"""
+
+# Chrome switches shared by every setup attempt, built once at import
+_CHROME_ARGUMENTS = (
+    # Essential server options
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-blink-features=AutomationControlled",
+
+    # Additional stability options
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-images",
+    "--disable-web-security",
+    "--allow-running-insecure-content",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+
+    # Location and privacy options to avoid detection
+    "--disable-geolocation",
+    "--disable-location-history",
+    "--disable-notifications",
+    "--disable-popup-blocking",
+    "--disable-translate",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-component-extensions-with-background-pages",
+
+    # Additional anti-detection measures
+    "--disable-features=VizDisplayCompositor",
+    "--disable-ipc-flooding-protection",
+    "--disable-hang-monitor",
+    "--disable-prompt-on-repost",
+    "--disable-domain-reliability",
+    "--disable-features=TranslateUI",
+    "--disable-component-update",
+    "--disable-client-side-phishing-detection",
+    "--disable-sync-preferences",
+    "--disable-sync-app-list",
+    "--disable-sync-app-settings",
+    "--disable-sync-autofill",
+    "--disable-sync-bookmarks",
+    "--disable-sync-extensions",
+    "--disable-sync-history",
+    "--disable-sync-passwords",
+    "--disable-sync-preferences",
+    "--disable-sync-sessions",
+    "--disable-sync-tabs",
+    "--disable-sync-themes",
+    "--disable-sync-typed-urls",
+
+    # Server-specific additional options
+    "--disable-software-rasterizer",
+    "--hide-scrollbars",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--safebrowsing-disable-auto-update",
+)
+
+# Local environment content settings, passed to every setup attempt unchanged
+_CHROME_PREFS = {
+    "safebrowsing.enabled": True,
+    "safebrowsing.disable_download_protection": True,
+    "profile.default_content_settings.popups": 0,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.managed_default_content_settings.images": 2,
+    # Location and privacy settings to match local environment
+    "profile.default_content_setting_values.geolocation": 2,  # Block geolocation
+    "profile.default_content_setting_values.media_stream": 2,  # Block media access
+    "profile.default_content_setting_values.camera": 2,  # Block camera
+    "profile.default_content_setting_values.microphone": 2,  # Block microphone
+    "profile.default_content_setting_values.plugins": 1,  # Allow plugins
+    "profile.default_content_setting_values.popups": 0,  # Allow popups
+    "profile.default_content_setting_values.automatic_downloads": 1,  # Allow downloads
+    # Disable location services
+    "profile.default_content_setting_values.location": 2,
+    # Disable background sync
+    "profile.default_content_setting_values.background_sync": 2,
+    # Disable payment handler
+    "profile.default_content_setting_values.payment_handler": 2,
+    # Disable sensors
+    "profile.default_content_setting_values.sensors": 2,
+    # Disable serial
+    "profile.default_content_setting_values.serial": 2,
+    # Disable usb
+    "profile.default_content_setting_values.usb": 2,
+    # Disable clipboard
+    "profile.default_content_setting_values.clipboard": 2,
+    # Disable midi
+    "profile.default_content_setting_values.midi": 2,
+    # Disable hid
+    "profile.default_content_setting_values.hid": 2,
+    # Disable file system
+    "profile.default_content_setting_values.file_system": 2,
+    # Disable bluetooth
+    "profile.default_content_setting_values.bluetooth": 2,
+    # Disable nfc
+    "profile.default_content_setting_values.nfc": 2,
+    # Disable vr
+    "profile.default_content_setting_values.vr": 2,
+    # Disable ar
+    "profile.default_content_setting_values.ar": 2,
+    # Disable window placement
+    "profile.default_content_setting_values.window_placement": 2,
+    # Disable local fonts
+    "profile.default_content_setting_values.local_fonts": 2,
+    # Disable idle detection
+    "profile.default_content_setting_values.idle_detection": 2,
+    # Disable storage access
+    "profile.default_content_setting_values.storage_access": 2,
+    # Disable top frame navigation
+    "profile.default_content_setting_values.top_frame_navigation": 2,
+    # Disable web share
+    "profile.default_content_setting_values.web_share": 2,
+    # Disable web authentication
+    "profile.default_content_setting_values.web_authentication": 2,
+    # Disable web payment
+    "profile.default_content_setting_values.web_payment": 2
+}
+
 class ServiceM8APIExtractor:
-    def __init__(self, max_retries=3, download_dir=None):
+    # ChromeDriver binary resolved once per process, CHROMEDRIVER_PATH pins it and skips webdriver-manager
+    _driver_path = os.getenv("CHROMEDRIVER_PATH")
+    
+    def __init__(self, max_retries=3, download_dir=None, profile_dir=PROFILE_DIR, email=None, password=None,
+                 cookies_file="servicem8_cookies.json"):
         self.driver = None
-        self.email = os.getenv("EMAIL")
-        self.password = os.getenv("PASSWORD")
+        self.email = email or os.getenv("EMAIL")
+        self.password = password or os.getenv("PASSWORD")
         self.max_retries = max_retries
-        self.cookies_file = "servicem8_cookies.json"
+        self.cookies_file = cookies_file
         self.download_dir = download_dir or os.path.join(os.getcwd(), "downloads")
-        self.temp_user_data_dir = None
+        self.profile_dir = profile_dir
+        self._token_buffer = {}
+        self._downloads = {}
+        self._using_profile = False
+        # Keep-alive session so repeated responsiveness checks skip the TCP/TLS handshake
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self._http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
         logger.info("ServiceM8APIExtractor initialized")
         
     def save_cookies(self):
@@ -53,14 +297,14 @@ class ServiceM8APIExtractor:
             cookies = self.driver.get_cookies()
             with open(self.cookies_file, 'w') as f:
                 json.dump(cookies, f, indent=2)
-            logger.info(f"Cookies saved to {self.cookies_file}")
+            logger.info("Cookies saved to %s", self.cookies_file)
             return True
         except Exception as e:
-            logger.error(f"Failed to save cookies: {e}")
+            logger.error("Failed to save cookies: %s", e)
             return False
     
     def load_cookies(self):
-        """Load cookies from file"""
+        """Load cookies from file with a single CDP call, no navigation needed"""
         try:
             if not os.path.exists(self.cookies_file):
                 logger.info("No cookies file found")
@@ -69,89 +313,30 @@ class ServiceM8APIExtractor:
             with open(self.cookies_file, 'r') as f:
                 cookies = json.load(f)
             
-            # First navigate to the domain to set cookies
-            self.driver.get("https://go.servicem8.com")
-            time.sleep(2)
-            
-            # Add each cookie with domain handling
-            successful_cookies = 0
+            # CDP expects 'expires' where WebDriver uses 'expiry', and capitalized sameSite values
             for cookie in cookies:
-                try:
-                    # Create a copy to avoid modifying the original
-                    cookie_copy = cookie.copy()
-                    
-                    # Remove 'expiry' key if it exists as it can cause issues
-                    if 'expiry' in cookie_copy:
-                        del cookie_copy['expiry']
-                    
-                    # Handle domain issues - try different domain variations
-                    original_domain = cookie_copy.get('domain', '')
-                    
-                    # Try the original domain first
-                    try:
-                        self.driver.add_cookie(cookie_copy)
-                        successful_cookies += 1
-                        continue
-                    except Exception as domain_error:
-                        logger.debug(f"Failed with original domain {original_domain}: {domain_error}")
-                    
-                    # Try without the leading dot
-                    if original_domain.startswith('.'):
-                        cookie_copy['domain'] = original_domain[1:]
-                        try:
-                            self.driver.add_cookie(cookie_copy)
-                            successful_cookies += 1
-                            continue
-                        except Exception:
-                            pass
-                    
-                    # Try with go.servicem8.com domain
-                    if 'servicem8.com' in original_domain:
-                        cookie_copy['domain'] = 'go.servicem8.com'
-                        try:
-                            self.driver.add_cookie(cookie_copy)
-                            successful_cookies += 1
-                            continue
-                        except Exception:
-                            pass
-                    
-                    # Try with servicem8.com domain
-                    if 'go.servicem8.com' in original_domain:
-                        cookie_copy['domain'] = 'servicem8.com'
-                        try:
-                            self.driver.add_cookie(cookie_copy)
-                            successful_cookies += 1
-                            continue
-                        except Exception:
-                            pass
-                    
-                    # If all domain attempts fail, try without domain
-                    if 'domain' in cookie_copy:
-                        del cookie_copy['domain']
-                        try:
-                            self.driver.add_cookie(cookie_copy)
-                            successful_cookies += 1
-                            continue
-                        except Exception:
-                            pass
-                    
-                    logger.warning(f"Failed to add cookie {cookie.get('name', 'unknown')} with all domain variations")
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to add cookie {cookie.get('name', 'unknown')}: {e}")
+                if not cookie.get('domain'):
+                    cookie['domain'] = SITE_HOST
+                if 'expiry' in cookie:
+                    cookie['expires'] = cookie.pop('expiry')
+                if 'sameSite' in cookie:
+                    cookie['sameSite'] = cookie['sameSite'].capitalize()
+            
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
             
-            logger.info(f"Successfully loaded {successful_cookies}/{len(cookies)} cookies from {self.cookies_file}")
-            return successful_cookies > 0
+            logger.info("Successfully loaded %d cookies from %s", len(cookies), self.cookies_file)
+            return len(cookies) > 0
             
         except Exception as e:
-            logger.error(f"Failed to load cookies: {e}")
+            logger.error("Failed to load cookies: %s", e)
             return False
     
     def clear_invalid_cookies(self):
         """Clear cookies file if cookies are invalid"""
         try:
             if os.path.exists(self.cookies_file):
-                logger.info(f"Clearing invalid cookies from {self.cookies_file}")
+                logger.info("Clearing invalid cookies from %s", self.cookies_file)
                 os.remove(self.cookies_file)
                 logger.info("Cookies file cleared.")
                 return True
@@ -159,57 +344,62 @@ class ServiceM8APIExtractor:
                 logger.info("No cookies file to clear.")
                 return False
         except Exception as e:
-            logger.error(f"Error clearing invalid cookies: {e}")
+            logger.error("Error clearing invalid cookies: %s", e)
             return False
     
     def is_logged_in(self):
         """Check if already logged in by looking for login elements or dashboard elements"""
         try:
-            current_url = self.driver.current_url
+            # The URL alone settles the common cases without touching the DOM
+            current_url = self.driver.current_url.lower()
+            if "login" in current_url:
+                return False
+            if "servicem8.com" in current_url and ("dashboard" in current_url or "dispatch" in current_url):
+                logger.info("Already logged in - on an application page")
+                return True
+            
+            # Ambiguous URL, read the menu, login form and URL in one round-trip
+            state = self.driver.execute_script(
+                "return {menu: !!document.querySelector('.ThemeMainMenu'),"
+                " login: !!document.getElementById('user_email'), url: location.href};"
+            )
+            current_url = state['url'].lower()
             
             # If we're on login page, we're not logged in
-            if "login" in current_url.lower():
+            if "login" in current_url:
                 return False
             
-            # Look for elements that indicate we're logged in
-            wait = WebDriverWait(self.driver, 5)
-            
-            # Check for navigation menu (indicates logged in)
-            try:
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "ThemeMainMenu")))
+            # Navigation menu indicates logged in
+            if state['menu']:
                 logger.info("Already logged in - found navigation menu")
                 return True
-            except TimeoutException:
-                pass
             
-            # Check for user email field (indicates login page)
-            try:
-                self.driver.find_element(By.ID, "user_email")
+            # User email field indicates login page
+            if state['login']:
                 logger.info("Not logged in - found login form")
                 return False
-            except NoSuchElementException:
-                pass
             
             # If we're on servicem8.com but not on login page, assume logged in
-            if "servicem8.com" in current_url and "login" not in current_url.lower():
+            if "servicem8.com" in current_url:
                 logger.info("Already logged in - on servicem8 domain")
                 return True
             
             return False
             
         except Exception as e:
-            logger.warning(f"Error checking login status: {e}")
+            logger.warning("Error checking login status: %s", e)
             return False
     
     def login_with_cookies(self):
-        """Try to login using saved cookies"""
+        """Try to resume the saved session with a single page load"""
         try:
-            logger.info("Attempting to login with saved cookies...")
+            logger.info("Attempting to resume saved session...")
             
-            # Load cookies
-            if not self.load_cookies():
-                logger.info("No cookies available, will need fresh login")
-                return False
+            # Without the persistent profile the saved jar is all there is, inject it before the
+            # first navigation so that one page load already carries it
+            replayed = not self._using_profile and self.load_cookies()
+            if replayed:
+                logger.info("Saved cookies injected before navigation")
             
             # Navigate to the main page
             if not self.load_website_with_retry("https://go.servicem8.com"):
@@ -218,224 +408,129 @@ class ServiceM8APIExtractor:
             
             # Check if we're logged in
             if self.is_logged_in():
-                logger.info("Successfully logged in using cookies")
+                logger.info("Successfully resumed saved session")
                 return True
-            else:
-                logger.info("Cookies are invalid or expired, need fresh login")
-                return False
+            
+            # The profile's own session has expired, only then fall back to replaying saved cookies
+            if not replayed and self.load_cookies():
+                logger.info("Profile session expired, retrying with saved cookies")
+                if self.load_website_with_retry("https://go.servicem8.com") and self.is_logged_in():
+                    logger.info("Successfully resumed saved session from cookies")
+                    return True
+            
+            logger.info("Saved session is invalid or expired, need fresh login")
+            return False
                 
         except Exception as e:
-            logger.error(f"Error during cookie login: {e}")
+            logger.error("Error during cookie login: %s", e)
             return False
 
+    def _build_options(self, fingerprint_data, extra_arguments=()):
+        """Assemble Chrome options from the shared argument and pref constants"""
+        options = Options()
+        if HEADLESS and "--headless=new" not in extra_arguments:
+            options.add_argument("--headless=new")
+        for argument in extra_arguments:
+            options.add_argument(argument)
+        
+        # Apply device fingerprint to Chrome options
+        self.apply_device_fingerprint(options, fingerprint_data)
+        
+        for argument in _CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        # Expose DevTools network events so tokens can be read from outgoing requests
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
+        # Use fingerprint user agent if available, otherwise use default
+        if not fingerprint_data or 'user_agent' not in fingerprint_data:
+            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
+        
+        # Use fingerprint window size if available, otherwise use default
+        if not fingerprint_data or 'screen_resolution' not in fingerprint_data:
+            options.add_argument("--window-size=1920,1080")
+        
+        options.add_experimental_option("prefs", _CHROME_PREFS)
+        return options
+    
     def setup_chrome(self):
         """Setup Chrome with retry mechanism for browser initialization failures and download support"""
+        # Keep a browser that is still responding instead of paying for another startup
+        if self.driver:
+            try:
+                self.driver.window_handles
+                logger.info("Reusing running Chrome session")
+                return True
+            except Exception:
+                logger.info("Existing Chrome session is gone, starting a new one")
+        
+        # Create download directory if it doesn't exist
+        if not os.path.exists(self.download_dir):
+            os.makedirs(self.download_dir)
+            logger.info("Created download directory: %s", self.download_dir)
+        
+        # Persistent profile directory, kept between runs
+        os.makedirs(self.profile_dir, exist_ok=True)
+        
+        # Fingerprint and environment do not change between attempts, read them once
+        fingerprint_data = self.load_device_fingerprint()
+        is_server = self.is_server_environment()
+        profile_arguments = (f"--user-data-dir={self.profile_dir}", "--profile-directory=Default")
+        
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Chrome browser setup attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Chrome browser setup attempt %d/%d", attempt + 1, self.max_retries)
                 
-                # Clean up any existing driver instance and temp directory
+                # Clean up any existing driver instance
                 if self.driver:
                     try:
                         self.driver.quit()
-                    except:
+                    except Exception:
                         pass
                     self.driver = None
                 
-                # Clean up previous temp user data directory
-                if self.temp_user_data_dir and os.path.exists(self.temp_user_data_dir):
-                    try:
-                        shutil.rmtree(self.temp_user_data_dir)
-                        logger.info(f"Cleaned up previous temp user data directory: {self.temp_user_data_dir}")
-                    except Exception as e:
-                        logger.warning(f"Failed to clean up temp user data directory: {e}")
-                
-                # Create download directory if it doesn't exist
-                if not os.path.exists(self.download_dir):
-                    os.makedirs(self.download_dir)
-                    logger.info(f"Created download directory: {self.download_dir}")
-                
-                # Create unique temporary user data directory
-                self.temp_user_data_dir = os.path.join(tempfile.gettempdir(), f"chrome_user_data_{uuid.uuid4().hex[:8]}")
-                os.makedirs(self.temp_user_data_dir, exist_ok=True)
-                logger.info(f"Created temporary user data directory: {self.temp_user_data_dir}")
-                
-                options = Options()
-                
-                # Load and apply device fingerprint
-                fingerprint_data = self.load_device_fingerprint()
-                
-                # Server-specific options - try different approaches based on attempt
-                is_server = self.is_server_environment()
-                
-                if is_server:
-                    if attempt == 0:
-                        # First attempt: Try with headless mode (best for servers)
-                        logger.info("Server environment detected - attempting with headless mode")
-                        options.add_argument("--headless=new")
-                    elif attempt == 1:
-                        # Second attempt: Try without user-data-dir
-                        logger.info("Server environment - attempting without user-data-dir to avoid conflicts")
-                        # Don't add user-data-dir for this attempt
-                    else:
-                        # Third attempt: Try with user-data-dir but with additional server options
-                        logger.info("Server environment - attempting with user-data-dir and additional server options")
-                        options.add_argument(f"--user-data-dir={self.temp_user_data_dir}")
+                # The persistent profile comes first everywhere, later attempts run without it
+                # in case another Chrome still holds the profile lock
+                if attempt == 0:
+                    logger.info("%s environment detected - using user-data-dir",
+                                "Server" if is_server else "Local")
+                    extra_arguments = profile_arguments
                 else:
-                    # Local environment - use user-data-dir from first attempt
-                    if attempt == 0:
-                        logger.info("Local environment detected - using user-data-dir")
-                        options.add_argument(f"--user-data-dir={self.temp_user_data_dir}")
-                    else:
-                        logger.info("Local environment - attempting without user-data-dir")
-                        # Don't add user-data-dir for retry attempts
+                    logger.info("Attempting without user-data-dir to avoid profile conflicts")
+                    extra_arguments = ()
+                self._using_profile = bool(extra_arguments)
                 
-                # Apply device fingerprint to Chrome options
-                self.apply_device_fingerprint(options, fingerprint_data)
-                
-                # Essential server options
-                options.add_argument("--no-sandbox")
-                options.add_argument("--disable-dev-shm-usage")
-                options.add_argument("--disable-gpu")
-                options.add_argument("--disable-blink-features=AutomationControlled")
-                options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                options.add_experimental_option('useAutomationExtension', False)
-                
-                # Use fingerprint user agent if available, otherwise use default
-                if not fingerprint_data or 'user_agent' not in fingerprint_data:
-                    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
-                
-                # Use fingerprint window size if available, otherwise use default
-                if not fingerprint_data or 'screen_resolution' not in fingerprint_data:
-                    options.add_argument("--window-size=1920,1080")
-                
-                # Additional stability options
-                options.add_argument("--disable-extensions")
-                options.add_argument("--disable-plugins")
-                options.add_argument("--disable-images")
-                options.add_argument("--disable-web-security")
-                options.add_argument("--allow-running-insecure-content")
-                options.add_argument("--disable-background-timer-throttling")
-                options.add_argument("--disable-backgrounding-occluded-windows")
-                options.add_argument("--disable-renderer-backgrounding")
-                
-                # Location and privacy options to avoid detection
-                options.add_argument("--disable-geolocation")
-                options.add_argument("--disable-location-history")
-                options.add_argument("--disable-notifications")
-                options.add_argument("--disable-popup-blocking")
-                options.add_argument("--disable-translate")
-                options.add_argument("--disable-sync")
-                options.add_argument("--disable-background-networking")
-                options.add_argument("--disable-default-apps")
-                options.add_argument("--disable-component-extensions-with-background-pages")
-                
-                # Additional anti-detection measures
-                options.add_argument("--disable-features=VizDisplayCompositor")
-                options.add_argument("--disable-ipc-flooding-protection")
-                options.add_argument("--disable-hang-monitor")
-                options.add_argument("--disable-prompt-on-repost")
-                options.add_argument("--disable-domain-reliability")
-                options.add_argument("--disable-features=TranslateUI")
-                options.add_argument("--disable-component-update")
-                options.add_argument("--disable-client-side-phishing-detection")
-                options.add_argument("--disable-sync-preferences")
-                options.add_argument("--disable-sync-app-list")
-                options.add_argument("--disable-sync-app-settings")
-                options.add_argument("--disable-sync-autofill")
-                options.add_argument("--disable-sync-bookmarks")
-                options.add_argument("--disable-sync-extensions")
-                options.add_argument("--disable-sync-history")
-                options.add_argument("--disable-sync-passwords")
-                options.add_argument("--disable-sync-preferences")
-                options.add_argument("--disable-sync-sessions")
-                options.add_argument("--disable-sync-tabs")
-                options.add_argument("--disable-sync-themes")
-                options.add_argument("--disable-sync-typed-urls")
-                
-                # Server-specific additional options
-                options.add_argument("--disable-software-rasterizer")
-                options.add_argument("--hide-scrollbars")
-                options.add_argument("--metrics-recording-only")
-                options.add_argument("--mute-audio")
-                options.add_argument("--no-first-run")
-                options.add_argument("--safebrowsing-disable-auto-update")
+                # Servers have no display, always run headless there
+                if is_server:
+                    extra_arguments = ("--headless=new",) + extra_arguments
                 
-                # Download preferences and local environment settings
-                prefs = {
-                    "download.default_directory": self.download_dir,
-                    "download.prompt_for_download": False,
-                    "download.directory_upgrade": True,
-                    "safebrowsing.enabled": True,
-                    "safebrowsing.disable_download_protection": True,
-                    "profile.default_content_settings.popups": 0,
-                    "profile.default_content_setting_values.notifications": 2,
-                    "profile.managed_default_content_settings.images": 2,
-                    # Location and privacy settings to match local environment
-                    "profile.default_content_setting_values.geolocation": 2,  # Block geolocation
-                    "profile.default_content_setting_values.media_stream": 2,  # Block media access
-                    "profile.default_content_setting_values.camera": 2,  # Block camera
-                    "profile.default_content_setting_values.microphone": 2,  # Block microphone
-                    "profile.default_content_setting_values.plugins": 1,  # Allow plugins
-                    "profile.default_content_setting_values.popups": 0,  # Allow popups
-                    "profile.default_content_setting_values.automatic_downloads": 1,  # Allow downloads
-                    # Disable location services
-                    "profile.default_content_setting_values.location": 2,
-                    # Disable background sync
-                    "profile.default_content_setting_values.background_sync": 2,
-                    # Disable payment handler
-                    "profile.default_content_setting_values.payment_handler": 2,
-                    # Disable sensors
-                    "profile.default_content_setting_values.sensors": 2,
-                    # Disable serial
-                    "profile.default_content_setting_values.serial": 2,
-                    # Disable usb
-                    "profile.default_content_setting_values.usb": 2,
-                    # Disable clipboard
-                    "profile.default_content_setting_values.clipboard": 2,
-                    # Disable midi
-                    "profile.default_content_setting_values.midi": 2,
-                    # Disable hid
-                    "profile.default_content_setting_values.hid": 2,
-                    # Disable file system
-                    "profile.default_content_setting_values.file_system": 2,
-                    # Disable bluetooth
-                    "profile.default_content_setting_values.bluetooth": 2,
-                    # Disable nfc
-                    "profile.default_content_setting_values.nfc": 2,
-                    # Disable vr
-                    "profile.default_content_setting_values.vr": 2,
-                    # Disable ar
-                    "profile.default_content_setting_values.ar": 2,
-                    # Disable window placement
-                    "profile.default_content_setting_values.window_placement": 2,
-                    # Disable local fonts
-                    "profile.default_content_setting_values.local_fonts": 2,
-                    # Disable idle detection
-                    "profile.default_content_setting_values.idle_detection": 2,
-                    # Disable storage access
-                    "profile.default_content_setting_values.storage_access": 2,
-                    # Disable top frame navigation
-                    "profile.default_content_setting_values.top_frame_navigation": 2,
-                    # Disable web share
-                    "profile.default_content_setting_values.web_share": 2,
-                    # Disable web authentication
-                    "profile.default_content_setting_values.web_authentication": 2,
-                    # Disable web payment
-                    "profile.default_content_setting_values.web_payment": 2
-                }
-                options.add_experimental_option("prefs", prefs)
+                options = self._build_options(fingerprint_data, extra_arguments)
                 
                 # Use webdriver-manager to automatically download and manage ChromeDriver
                 try:
-                    service = Service(ChromeDriverManager().install())
+                    # Only ask webdriver-manager once, it checks the latest version online on every install()
+                    if ServiceM8APIExtractor._driver_path is None:
+                        ServiceM8APIExtractor._driver_path = ChromeDriverManager().install()
+                        logger.info("ChromeDriver automatically downloaded and configured")
+                    service = Service(ServiceM8APIExtractor._driver_path)
                     self.driver = webdriver.Chrome(service=service, options=options)
-                    logger.info("ChromeDriver automatically downloaded and configured")
                 except Exception as e:
-                    logger.warning(f"Failed to use webdriver-manager, falling back to system ChromeDriver: {e}")
+                    logger.warning("Failed to use webdriver-manager, falling back to system ChromeDriver: %s", e)
                     self.driver = webdriver.Chrome(options=options)
                 
                 self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+                # Install the token extractor once per page so V8 compiles it, and its regex, a single time
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                    "source": "window.__extractTokens = function() {" + _EXTRACT_JS + "};"
+                })
+                # Downloads land in download_dir and report progress as Page.downloadProgress events
+                self.driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+                    "behavior": "allow",
+                    "downloadPath": os.path.abspath(self.download_dir)
+                })
                 
                 # Apply additional fingerprint settings after browser starts
                 if fingerprint_data:
@@ -447,22 +542,24 @@ class ServiceM8APIExtractor:
                 return True
                 
             except WebDriverException as e:
-                logger.error(f"WebDriver setup failed on attempt {attempt + 1}: {e}")
+                logger.error("WebDriver setup failed on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Unexpected error during Chrome setup attempt {attempt + 1}: {e}")
+                logger.error("Unexpected error during Chrome setup attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
         
         return False
     
+    def wait_for(self, condition, timeout=10, poll=0.2):
+        """Wait until condition holds, polling every 200 ms instead of sleeping a fixed time"""
+        return WebDriverWait(self.driver, timeout, poll_frequency=poll).until(condition)
+    
     def load_device_fingerprint(self):
         """Load device fingerprint from file"""
         try:
@@ -478,7 +575,7 @@ class ServiceM8APIExtractor:
             return fingerprint_data
             
         except Exception as e:
-            logger.warning(f"Failed to load device fingerprint: {e}")
+            logger.warning("Failed to load device fingerprint: %s", e)
             return None
     
     def apply_device_fingerprint(self, options, fingerprint_data):
@@ -490,27 +587,27 @@ class ServiceM8APIExtractor:
             # Apply user agent
             if 'user_agent' in fingerprint_data:
                 options.add_argument(f"--user-agent={fingerprint_data['user_agent']}")
-                logger.info(f"Applied user agent: {fingerprint_data['user_agent']}")
+                logger.info("Applied user agent: %s", fingerprint_data['user_agent'])
             
             # Apply screen resolution
             if 'screen_resolution' in fingerprint_data:
                 options.add_argument(f"--window-size={fingerprint_data['screen_resolution']}")
-                logger.info(f"Applied screen resolution: {fingerprint_data['screen_resolution']}")
+                logger.info("Applied screen resolution: %s", fingerprint_data['screen_resolution'])
             
             # Apply language settings
             if 'language' in fingerprint_data:
                 options.add_argument(f"--lang={fingerprint_data['language']}")
-                logger.info(f"Applied language: {fingerprint_data['language']}")
+                logger.info("Applied language: %s", fingerprint_data['language'])
             
             # Apply timezone
             if 'timezone' in fingerprint_data:
                 options.add_argument(f"--timezone={fingerprint_data['timezone']}")
-                logger.info(f"Applied timezone: {fingerprint_data['timezone']}")
+                logger.info("Applied timezone: %s", fingerprint_data['timezone'])
             
             logger.info("Applied existing device fingerprint to Chrome options")
             
         except Exception as e:
-            logger.warning(f"Failed to apply device fingerprint: {e}")
+            logger.warning("Failed to apply device fingerprint: %s", e)
     
     def apply_fingerprint_after_start(self, fingerprint_data):
         """Apply additional fingerprint settings after browser starts"""
@@ -592,7 +689,7 @@ class ServiceM8APIExtractor:
             logger.info("Applied additional fingerprint settings after browser start")
             
         except Exception as e:
-            logger.warning(f"Failed to apply fingerprint after start: {e}")
+            logger.warning("Failed to apply fingerprint after start: %s", e)
     
     def is_server_environment(self):
         """Detect if running in a server environment"""
@@ -612,66 +709,118 @@ class ServiceM8APIExtractor:
             ]
             
             is_server = any(server_indicators)
-            logger.info(f"Server environment detected: {is_server}")
+            logger.info("Server environment detected: %s", is_server)
             return is_server
             
         except Exception as e:
-            logger.warning(f"Error detecting server environment: {e}")
+            logger.warning("Error detecting server environment: %s", e)
             return False
     
+    def sync_http_cookies(self):
+        """Copy the browser's cookies into the HTTP session so direct requests are authenticated"""
+        for cookie in self.driver.get_cookies():
+            self._http.cookies.set(cookie['name'], cookie['value'],
+                                   domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+    
+    def _stream_download(self, url, filename=None):
+        """Stream a URL to the download directory over the HTTP session, returns the file path"""
+        os.makedirs(self.download_dir, exist_ok=True)
+        with self._http.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            filename = filename or os.path.basename(urlparse(response.url).path) or "download"
+            file_path = os.path.join(self.download_dir, filename)
+            
+            # Write to a side file so a half-finished download never has the final name
+            partial_path = f"{file_path}.part"
+            with open(partial_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+            os.replace(partial_path, file_path)
+        
+        return file_path
+    
     def download_file(self, url, filename=None):
-        """Download a file using the configured Chrome browser"""
+        """Download a file with the browser session's cookies, without going through the browser"""
         try:
-            logger.info(f"Starting download from: {url}")
-            
-            # Navigate to the download URL
-            self.driver.get(url)
-            time.sleep(3)  # Wait for download to start
+            logger.info("Starting download from: %s", url)
             
-            # If filename is provided, we can rename the file after download
-            if filename:
-                # Wait for download to complete and rename if needed
-                self.wait_for_download_completion(filename)
+            if self.driver:
+                self.sync_http_cookies()
+            file_path = self._stream_download(url, filename)
             
-            logger.info("Download completed successfully")
+            logger.info("Download completed successfully: %s", os.path.basename(file_path))
             return True
             
         except Exception as e:
-            logger.error(f"Error downloading file: {e}")
+            logger.error("Error downloading file: %s", e)
             return False
     
+    def download_files(self, urls, max_workers=8):
+        """Download several files concurrently, returns the paths of the ones that succeeded"""
+        if self.driver:
+            self.sync_http_cookies()
+        
+        def download(url):
+            try:
+                return self._stream_download(url)
+            except Exception as e:
+                logger.error("Error downloading %s: %s", url, e)
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            paths = list(pool.map(download, urls))
+        
+        logger.info("Downloaded %d/%d files", sum(1 for path in paths if path), len(urls))
+        return [path for path in paths if path]
+    
+    def _downloaded_path(self, suggested_name):
+        """Find the file Chrome wrote for a suggested name, it de-duplicates clashes as 'name (1).ext'"""
+        import glob
+        stem, ext = os.path.splitext(suggested_name)
+        pattern = os.path.join(glob.escape(self.download_dir), f"{glob.escape(stem)} (*){glob.escape(ext)}")
+        candidates = glob.glob(pattern)
+        file_path = os.path.join(self.download_dir, suggested_name)
+        if os.path.exists(file_path):
+            candidates.append(file_path)
+        
+        # An older download can hold the plain name, the newest file is the one just finished
+        return max(candidates, key=os.path.getmtime) if candidates else None
+    
     def wait_for_download_completion(self, expected_filename=None, timeout=60):
-        """Wait for download to complete and optionally rename the file"""
+        """Wait for a browser download to finish and optionally rename the file"""
         try:
-            import glob
-            
-            # Wait for download to complete
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                # Check for .crdownload files (Chrome download in progress)
-                temp_files = glob.glob(os.path.join(self.download_dir, "*.crdownload"))
-                if not temp_files:
-                    # Check for the expected file or any new files
-                    if expected_filename:
+            # Only downloads that finish after this call count
+            finished = {guid for guid, download in self._downloads.items() if download["state"] != "inProgress"}
+            
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                self._drain_performance_log()
+                for guid, download in self._downloads.items():
+                    if guid in finished or download["state"] == "inProgress":
+                        continue
+                    if download["state"] == "canceled":
+                        logger.warning("Download was canceled")
+                        return None
+                    
+                    file_path = self._downloaded_path(download["name"])
+                    if file_path is None:
+                        logger.warning("Finished download %s not found in %s", download["name"], self.download_dir)
+                        return None
+                    if expected_filename and expected_filename != os.path.basename(file_path):
                         expected_path = os.path.join(self.download_dir, expected_filename)
-                        if os.path.exists(expected_path):
-                            logger.info(f"Download completed: {expected_filename}")
-                            return expected_path
-                    else:
-                        # Find the most recently downloaded file
-                        all_files = glob.glob(os.path.join(self.download_dir, "*"))
-                        if all_files:
-                            latest_file = max(all_files, key=os.path.getctime)
-                            logger.info(f"Download completed: {os.path.basename(latest_file)}")
-                            return latest_file
+                        os.replace(file_path, expected_path)
+                        file_path = expected_path
+                    
+                    logger.info("Download completed: %s", os.path.basename(file_path))
+                    return file_path
                 
-                time.sleep(1)
+                time.sleep(0.2)
             
             logger.warning("Download timeout reached")
             return None
             
         except Exception as e:
-            logger.error(f"Error waiting for download completion: {e}")
+            logger.error("Error waiting for download completion: %s", e)
             return None
     
     def get_downloaded_files(self):
@@ -694,29 +843,28 @@ class ServiceM8APIExtractor:
             return sorted(files, key=lambda x: x['modified'], reverse=True)
             
         except Exception as e:
-            logger.error(f"Error getting downloaded files: {e}")
+            logger.error("Error getting downloaded files: %s", e)
             return []
     
     def check_website_responsiveness(self, url):
         """Check if website is responsive by making a simple request"""
         try:
-            import requests
-            response = requests.get(url, timeout=10)
+            response = self._http.get(url, timeout=(3, 7))
             return response.status_code == 200
         except Exception as e:
-            logger.warning(f"Website responsiveness check failed: {e}")
+            logger.warning("Website responsiveness check failed: %s", e)
             return False
 
     def load_website_with_retry(self, url, max_retries=3):
         """Load website with retry mechanism for loading failures"""
+        probe = None
         for attempt in range(max_retries):
             try:
-                logger.info(f"Loading website attempt {attempt + 1}/{max_retries}: {url}")
+                logger.info("Loading website attempt %d/%d: %s", attempt + 1, max_retries, url)
                 
-                # Check website responsiveness first
+                # Check website responsiveness in the background while the browser loads
                 if attempt == 0:  # Only check on first attempt
-                    if not self.check_website_responsiveness(url):
-                        logger.warning("Website responsiveness check failed, but continuing with browser load")
+                    probe = _probe_executor.submit(self.check_website_responsiveness, url)
                 
                 self.driver.get(url)
                 
@@ -734,29 +882,30 @@ class ServiceM8APIExtractor:
                 # Verify page loaded correctly by checking title or URL
                 current_url = self.driver.current_url
                 if current_url and not current_url.startswith("data:"):
-                    logger.info(f"Website loaded successfully on attempt {attempt + 1}")
+                    logger.info("Website loaded successfully on attempt %d", attempt + 1)
                     return True
                 else:
-                    logger.warning(f"Website may not have loaded correctly - URL: {current_url}")
+                    logger.warning("Website may not have loaded correctly - URL: %s", current_url)
                     if attempt < max_retries - 1:
-                        time.sleep(5)
+                        _sleep_backoff(attempt)
                     else:
                         return False
                 
             except TimeoutException as e:
-                logger.warning(f"Website loading timeout on attempt {attempt + 1}: {e}")
+                logger.warning("Website loading timeout on attempt %d: %s", attempt + 1, e)
+                # Only consult the probe when the browser load failed
+                if probe is not None and probe.done() and not probe.result():
+                    logger.warning("Website responsiveness check failed as well")
                 if attempt < max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     logger.error("Failed to load website after all retry attempts")
                     return False
                     
             except Exception as e:
-                logger.warning(f"Website loading error on attempt {attempt + 1}: {e}")
+                logger.warning("Website loading error on attempt %d: %s", attempt + 1, e)
                 if attempt < max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     logger.error("Failed to load website after all retry attempts")
                     return False
@@ -767,13 +916,13 @@ class ServiceM8APIExtractor:
         """Login to ServiceM8 with retry mechanism"""
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Login attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Login attempt %d/%d", attempt + 1, self.max_retries)
                 
                 # Load website with retry
                 if not self.load_website_with_retry("https://go.servicem8.com"):
                     logger.error("Failed to load ServiceM8 website")
                     if attempt < self.max_retries - 1:
-                        time.sleep(5)
+                        _sleep_backoff(attempt)
                         continue
                     else:
                         return False
@@ -792,7 +941,11 @@ class ServiceM8APIExtractor:
                 submit_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
                 submit_button.click()
                 
-                time.sleep(5)
+                # The login page is already on servicem8.com, so wait for the app's main menu instead of the host
+                try:
+                    self.wait_for(EC.presence_of_element_located((By.CLASS_NAME, "ThemeMainMenu")), timeout=20)
+                except TimeoutException:
+                    pass
                 
                 current_url = self.driver.current_url
                 if "login" not in current_url.lower() and "servicem8.com" in current_url:
@@ -801,29 +954,28 @@ class ServiceM8APIExtractor:
                     self.save_cookies()
                     return True
                 else:
-                    logger.warning(f"Login failed on attempt {attempt + 1} - still on login page")
+                    logger.warning("Login failed on attempt %d - still on login page", attempt + 1)
                     if attempt < self.max_retries - 1:
-                        logger.info("Waiting 5 seconds before retry...")
-                        time.sleep(5)
+                        _sleep_backoff(attempt)
                     else:
                         return False
                         
             except TimeoutException as e:
-                logger.error(f"Login timeout on attempt {attempt + 1}: {e}")
+                logger.error("Login timeout on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
             except NoSuchElementException as e:
-                logger.error(f"Login element not found on attempt {attempt + 1}: {e}")
+                logger.error("Login element not found on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Login error on attempt {attempt + 1}: {e}")
+                logger.error("Login error on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
         
@@ -840,14 +992,17 @@ class ServiceM8APIExtractor:
             popup_close_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".x-tool.x-tool-close")))
             popup_close_button.click()
             logger.info("Successfully closed Updates popup")
-            time.sleep(2)  # Wait for popup to close
+            try:
+                self.wait_for(EC.invisibility_of_element(popup_close_button), timeout=2)
+            except TimeoutException:
+                pass
             return True
             
         except TimeoutException:
             logger.info("No popup found or popup already closed")
             return True
         except Exception as e:
-            logger.warning(f"Error handling popup: {e}")
+            logger.warning("Error handling popup: %s", e)
             return True  # Continue even if popup handling fails
         
 
@@ -856,7 +1011,7 @@ class ServiceM8APIExtractor:
         """Navigate to Dispatch Board with retry mechanism"""
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Navigation to Dispatch Board attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Navigation to Dispatch Board attempt %d/%d", attempt + 1, self.max_retries)
                 wait = WebDriverWait(self.driver, 10)
 
                 self.handle_popup()
@@ -868,9 +1023,11 @@ class ServiceM8APIExtractor:
                 dispatch_link = wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, 'job_dispatch')]")))
                 dispatch_link.click()
                 
-                # Wait for page to load
-                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                time.sleep(10)
+                # Wait for the Dispatch Board route to load
+                try:
+                    self.wait_for(EC.url_contains("job_dispatch"), timeout=15)
+                except TimeoutException:
+                    pass
                 
                 # Verify we're on the dispatch page
                 current_url = self.driver.current_url
@@ -878,33 +1035,29 @@ class ServiceM8APIExtractor:
                     logger.info("Successfully navigated to Dispatch Board")
                     return True
                 else:
-                    logger.warning(f"Navigation may have failed - URL doesn't contain dispatch: {current_url}")
+                    logger.warning("Navigation may have failed - URL doesn't contain dispatch: %s", current_url)
                     if attempt < self.max_retries - 1:
-                        logger.info("Waiting 5 seconds before retry...")
-                        time.sleep(5)
+                        _sleep_backoff(attempt)
                     else:
                         logger.warning("Navigation completed but URL verification failed")
                         return True  # Still return True as we may have reached the page
                 
             except TimeoutException as e:
-                logger.error(f"Navigation timeout on attempt {attempt + 1}: {e}")
+                logger.error("Navigation timeout on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
             except NoSuchElementException as e:
-                logger.error(f"Navigation element not found on attempt {attempt + 1}: {e}")
+                logger.error("Navigation element not found on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
             except Exception as e:
-                logger.error(f"Navigation error on attempt {attempt + 1}: {e}")
+                logger.error("Navigation error on attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    logger.info("Waiting 5 seconds before retry...")
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
                 else:
                     return False
         
@@ -914,170 +1067,129 @@ class ServiceM8APIExtractor:
         """Extract API data with retry logic if no tokens found"""
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"Token extraction attempt {attempt + 1}/{self.max_retries}")
+                logger.info("Token extraction attempt %d/%d", attempt + 1, self.max_retries)
                 
                 # Extract API data
                 auth_tokens, cookie_string = self.extract_api_data()
                 
                 # Check if we found any tokens
                 if auth_tokens:
-                    logger.info(f"Successfully found {len(auth_tokens)} tokens on attempt {attempt + 1}")
+                    logger.info("Successfully found %d tokens on attempt %d", len(auth_tokens), attempt + 1)
                     return auth_tokens, cookie_string
                 else:
-                    logger.warning(f"No tokens found on attempt {attempt + 1}")
+                    logger.warning("No tokens found on attempt %d", attempt + 1)
                     
                     # If not the last attempt, wait and try again
                     if attempt < self.max_retries - 1:
-                        logger.info(f"Waiting 5 seconds before retry...")
-                        time.sleep(5)
-                        
-                        # Try refreshing the page
+                        # Try refreshing the page, then wait for the app menu instead of sleeping
                         try:
                             self.driver.refresh()
-                            time.sleep(3)
+                            self.wait_for(EC.presence_of_element_located((By.CLASS_NAME, "ThemeMainMenu")), timeout=15)
                             logger.info("Page refreshed for retry")
                         except Exception as e:
-                            logger.warning(f"Failed to refresh page: {e}")
+                            logger.warning("Failed to refresh page: %s", e)
                     
             except Exception as e:
-                logger.error(f"Error during token extraction attempt {attempt + 1}: {e}")
+                logger.error("Error during token extraction attempt %d: %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
-                    time.sleep(5)
+                    _sleep_backoff(attempt)
         
         logger.error("Failed to extract tokens after all retry attempts")
         return {}, ""
     
+    def _drain_performance_log(self):
+        """Read the buffered DevTools events once, routing token requests and download progress"""
+        for entry in self.driver.get_log("performance"):
+            # Drained entries are not returned again, so a malformed one is skipped rather than losing the rest
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params") or {}
+            
+            if method == "Network.requestWillBeSent":
+                for match in _TOKEN_RE.finditer((params.get("request") or {}).get("url", "")):
+                    self._token_buffer[_TOKEN_KEYS[match.group(1)]] = match.group(2)
+            elif method == "Page.downloadWillBegin" and params.get("guid"):
+                self._downloads[params["guid"]] = {"name": params.get("suggestedFilename", ""), "state": "inProgress"}
+            elif method == "Page.downloadProgress" and params.get("guid") in self._downloads and "state" in params:
+                self._downloads[params["guid"]]["state"] = params["state"]
+    
+    def collect_network_tokens(self):
+        """Collect s_auth tokens from the URLs of requests the page has sent since the last call"""
+        try:
+            self._drain_performance_log()
+        except Exception as e:
+            logger.debug("Failed to read network events: %s", e)
+        
+        # Reading the log drains it, so keep what earlier calls have seen
+        return self._token_buffer
+    
     def extract_api_data(self):
         """Extract API tokens and cookies for specific URLs"""
         try:
             logger.info("Extracting API data...")
-            # JavaScript to find specific API URLs and tokens
-            js_code = """
-            var apiData = [];
-            var authTokens = {};
-            var allUrls = [];
-            
-            // Search all script tags
-            var scripts = document.getElementsByTagName('script');
-            for (var i = 0; i < scripts.length; i++) {
-                var scriptContent = scripts[i].innerHTML;
-                
-                // Look for CalendarStoreRequest
-                var calendarMatches = scriptContent.match(/CalendarStoreRequest[^'"]*s_auth=([a-f0-9]+)/g);
-                if (calendarMatches) {
-                    calendarMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['CalendarStoreRequest'] = authMatch[1];
-                            allUrls.push('CalendarStoreRequest');
-                        }
-                    });
-                }
-                
-                // Look for PluginReminders_UpdateReminderForJobActivity
-                var updateMatches = scriptContent.match(/PluginReminders_UpdateReminderForJobActivity[^'"]*s_auth=([a-f0-9]+)/g);
-                if (updateMatches) {
-                    updateMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['UpdateReminderForJobActivity'] = authMatch[1];
-                            allUrls.push('UpdateReminderForJobActivity');
-                        }
-                    });
-                }
-                
-                // Look for PluginReminders_SaveRecurringJobSchedule
-                var saveMatches = scriptContent.match(/PluginReminders_SaveRecurringJobSchedule[^'"]*s_auth=([a-f0-9]+)/g);
-                if (saveMatches) {
-                    saveMatches.forEach(function(match) {
-                        var authMatch = match.match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['SaveRecurringJobSchedule'] = authMatch[1];
-                            allUrls.push('SaveRecurringJobSchedule');
-                        }
-                    });
-                }
-            }
-            
-            // Also search in window object
-            for (var prop in window) {
-                if (typeof window[prop] === 'string' && window[prop].includes('s_auth=')) {
-                    if (window[prop].includes('CalendarStoreRequest')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['CalendarStoreRequest'] = authMatch[1];
-                        }
-                    }
-                    if (window[prop].includes('PluginReminders_UpdateReminderForJobActivity')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['UpdateReminderForJobActivity'] = authMatch[1];
-                        }
-                    }
-                    if (window[prop].includes('PluginReminders_SaveRecurringJobSchedule')) {
-                        var authMatch = window[prop].match(/s_auth=([a-f0-9]+)/);
-                        if (authMatch) {
-                            authTokens['SaveRecurringJobSchedule'] = authMatch[1];
-                        }
-                    }
-                }
-            }
-            
-            return {
-                authTokens: authTokens,
-                foundUrls: allUrls
-            };
-            """
+            # Call the extractor installed on every page by setup_chrome, fall back to shipping it
+            result = self.driver.execute_script("return window.__extractTokens ? window.__extractTokens() : null;")
+            if result is None:
+                result = self.driver.execute_script(_EXTRACT_JS)
             
-            result = self.driver.execute_script(js_code)
+            # Tokens seen in live network traffic take precedence over the script scan
+            auth_tokens = result['authTokens']
+            auth_tokens.update(self.collect_network_tokens())
             
             # Get cookies
             all_cookies = self.driver.get_cookies()
-            cookie_string = ""
-            for cookie in all_cookies:
-                if cookie_string:
-                    cookie_string += "; "
-                cookie_string += f"{cookie['name']}={cookie['value']}"
+            cookie_string = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in all_cookies)
             
-            logger.info(f"Found {len(result['authTokens'])} auth tokens: {list(result['authTokens'].keys())}")
-            return result['authTokens'], cookie_string
+            logger.info("Found %d auth tokens: %s", len(auth_tokens), list(auth_tokens.keys()))
+            return auth_tokens, cookie_string
             
         except WebDriverException as e:
-            logger.error(f"WebDriver error during API data extraction: {e}")
+            logger.error("WebDriver error during API data extraction: %s", e)
             return {}, ""
         except Exception as e:
-            logger.error(f"Error extracting API data: {e}")
+            logger.error("Error extracting API data: %s", e)
             return {}, ""
     
     def create_api_response(self, auth_tokens, cookie_string):
         """Create the response in the requested format"""
-        api_data = []
-        
-        # CalendarStoreRequest
-        if 'CalendarStoreRequest' in auth_tokens:
-            api_data.append({
-                "url": f"https://go.servicem8.com/CalendarStoreRequest?s_cv=&s_form_values=query-start-limit-_dc-callback-records-xaction-end-id-strJobUUID&s_auth={auth_tokens['CalendarStoreRequest']}",
-                "cookie": cookie_string,
-                "s_auth": auth_tokens['CalendarStoreRequest']
-            })
-        
-        # UpdateReminderForJobActivity
-        if 'UpdateReminderForJobActivity' in auth_tokens:
-            api_data.append({
-                "url": f"https://ap-southeast-2.go.servicem8.com/PluginReminders_UpdateReminderForJobActivity?s_form_values=strReminderUUID-strOriginalStartDate-strOriginalEndDate-strOriginalStaffUUID-strNewStartDate-strNewEndDate-strNewStaffUUID-strNewStaffUUIDList-boolModifyAllFollowingRecurrences&s_auth={auth_tokens['UpdateReminderForJobActivity']}",
-                "cookie": cookie_string,
-                "s_auth": auth_tokens['UpdateReminderForJobActivity']
-            })
-        
-        # SaveRecurringJobSchedule
-        if 'SaveRecurringJobSchedule' in auth_tokens:
-            api_data.append({
-                "url": f"https://ap-southeast-2.go.servicem8.com/PluginReminders_SaveRecurringJobSchedule?s_form_values=strReminderUUID-strCustomerUUID-strJobTemplateUUID-strAlertMode-strAllocationWindowUUID-strScheduledStartTime-intScheduledDuration-strStaffUUID-strStaffUUIDList-strAlertDescription-strRecurrenceType-strDailyMode-strWeeklyMode-strMonthlyMode-strYearlyMode-intDailyInterval-intWeeklyInterval-intWeeklyWeeksAfterCompletion-arrWeeklyDayNames-intMonthlyDayEveryMonth-intMonthlyDayEveryMonthInterval-strMonthlyMode2WeekType-intMonthlyMode2DayName-intMonthlyMode2MonthInterval-strYearlyMode2WeekType-intYearlyMode1Month-intYearlyMode1Day-intYearlyMode2DayName-intYearlyMode2Month-strPatternStartDate-strPatternEndDateMode-strPatternEndDate-intPatternEndDateOccurrences-boolCancelReminder&s_auth={auth_tokens['SaveRecurringJobSchedule']}",
-                "cookie": cookie_string,
-                "s_auth": auth_tokens['SaveRecurringJobSchedule']
-            })
-        
-        return api_data
+        return [{"url": prefix + auth_tokens[key], "cookie": cookie_string, "s_auth": auth_tokens[key]}
+                for key, prefix in _ENDPOINTS if key in auth_tokens]
+    
+    def _try_http_extract(self):
+        """Log in and scan the Dispatch Board over plain HTTP, returns None when a browser is needed"""
+        try:
+            login_page = self._http.get(LOGIN_URL, timeout=(3, 10))
+            form = {}
+            for tag in _HIDDEN_INPUT_RE.findall(login_page.text):
+                attrs = dict((k.lower(), v) for k, v in _INPUT_ATTR_RE.findall(tag))
+                if "name" in attrs:
+                    form[attrs["name"]] = attrs.get("value", "")
+            form["user_email"] = self.email
+            form["user_password"] = self.password
+            
+            response = self._http.post(LOGIN_URL, data=form, timeout=(3, 10))
+            if "login" in response.url.lower():
+                logger.info("HTTP login did not leave the login page")
+                return None
+            
+            dispatch_page = self._http.get(DISPATCH_URL, timeout=(3, 15))
+            auth_tokens = {}
+            for match in _TOKEN_RE.finditer(dispatch_page.text):
+                auth_tokens[_TOKEN_KEYS[match.group(1)]] = match.group(2)
+            if not REQUIRED_TOKENS.issubset(auth_tokens):
+                logger.info("Dispatch Board HTML only has %s, it is probably rendered by JavaScript",
+                            sorted(auth_tokens))
+                return None
+            
+            cookie_string = "; ".join(f"{c.name}={c.value}" for c in self._http.cookies)
+            logger.info("Found %d auth tokens over HTTP: %s", len(auth_tokens), list(auth_tokens.keys()))
+            return self.create_api_response(auth_tokens, cookie_string) or None
+        except Exception as e:
+            logger.warning("HTTP extraction failed: %s", e)
+            return None
     
     def extract(self):
         """Main extraction method with comprehensive error handling"""
@@ -1091,6 +1203,13 @@ class ServiceM8APIExtractor:
             
             # Try to login with cookies first
             if not self.login_with_cookies():
+                # Before the form login, a few HTTP round-trips are enough when the served HTML has every token
+                if HTTP_EXTRACT:
+                    api_data = self._try_http_extract()
+                    if api_data:
+                        logger.info("Successfully extracted %d API endpoints over HTTP", len(api_data))
+                        return api_data
+                
                 logger.info("Cookie login failed, attempting fresh login...")
                 # If cookie login fails, do fresh login
                 if not self.login():
@@ -1113,14 +1232,16 @@ class ServiceM8APIExtractor:
             api_data = self.create_api_response(auth_tokens, cookie_string)
             
             if api_data:
-                logger.info(f"Successfully extracted {len(api_data)} API endpoints")
+                logger.info("Successfully extracted %d API endpoints", len(api_data))
+                # Keep the cookie jar as fresh as the profile so the next run's replay does not roll it back
+                self.save_cookies()
             else:
                 logger.warning("No API data created from extracted tokens")
             
             return api_data
             
         except Exception as e:
-            logger.error(f"Critical error in extraction process: {e}")
+            logger.error("Critical error in extraction process: %s", e)
             return None
         finally:
             if self.driver:
@@ -1128,15 +1249,38 @@ class ServiceM8APIExtractor:
                     logger.info("Closing browser...")
                     self.driver.quit()
                 except Exception as e:
-                    logger.warning(f"Error closing browser: {e}")
-            
-            # Clean up temporary user data directory
-            if self.temp_user_data_dir and os.path.exists(self.temp_user_data_dir):
-                try:
-                    shutil.rmtree(self.temp_user_data_dir)
-                    logger.info(f"Cleaned up temporary user data directory: {self.temp_user_data_dir}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary user data directory: {e}")
+                    logger.warning("Error closing browser: %s", e)
+                # A quit driver must not look reusable to the next setup_chrome
+                self.driver = None
+
+def _init_worker_logging(log_queue):
+    """Route a pool worker's records to the parent's listener instead of its own handlers"""
+    handler = logging.handlers.QueueHandler(log_queue)
+    # Only merge the arguments here, the parent's handlers add timestamp and level
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.getLogger().handlers = [handler]
+
+def run_one(email, password, max_retries=3):
+    """Run one extraction in a worker process with its own Chrome profile and cookie jar"""
+    profile_dir = tempfile.mkdtemp(prefix=f"chrome-{os.getpid()}-")
+    try:
+        extractor = ServiceM8APIExtractor(max_retries=max_retries, download_dir=os.getenv("DOWNLOAD_DIR", "downloads"),
+                                          profile_dir=profile_dir, email=email, password=password,
+                                          cookies_file=os.path.join(profile_dir, "cookies.json"))
+        return extractor.extract()
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+def _load_credentials():
+    """Read (email, password) pairs from the ACCOUNTS_FILE JSON list, falling back to EMAIL/PASSWORD"""
+    accounts_file = os.getenv("ACCOUNTS_FILE")
+    if accounts_file and os.path.exists(accounts_file):
+        with open(accounts_file, 'r') as f:
+            return [(account["email"], account["password"]) for account in json.load(f)]
+    
+    email = os.getenv("EMAIL")
+    password = os.getenv("PASSWORD")
+    return [(email, password)] if email and password else []
 
 def main():
     """Main function with comprehensive error handling"""
@@ -1144,49 +1288,81 @@ def main():
         logger.info("Starting ServiceM8 API Token Extractor...")
         
         # Check environment variables
-        email = os.getenv("EMAIL")
-        password = os.getenv("PASSWORD")
+        credentials = _load_credentials()
         webhook_url = os.getenv("WEBHOOK")
         
-        if not email or not password:
+        if not credentials:
             logger.error("EMAIL and PASSWORD environment variables not found!")
             logger.error("Please create a .env file with your ServiceM8 credentials")
             return
         
         logger.info("Environment variables loaded successfully")
         
-        # Run extraction with download support
-        download_dir = os.getenv("DOWNLOAD_DIR", "downloads")
-        extractor = ServiceM8APIExtractor(max_retries=3, download_dir=download_dir)
-        result = extractor.extract()
+        if len(credentials) > 1:
+            # Selenium drivers are not thread-safe, so each account gets its own process and Chrome
+            processes = min(os.cpu_count() or 1, len(credentials))
+            logger.info("Extracting %d accounts with %d worker processes", len(credentials), processes)
+            # Workers hand their records to one listener here, so only this process writes the log file
+            log_queue = multiprocessing.Queue(-1)
+            listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers,
+                                                      respect_handler_level=True)
+            listener.start()
+            try:
+                with multiprocessing.Pool(processes=processes, initializer=_init_worker_logging,
+                                          initargs=(log_queue,)) as pool:
+                    results = pool.starmap(run_one, credentials)
+            finally:
+                listener.stop()
+            
+            # Keep the single-account list schema, each endpoint is tagged with the account it belongs to
+            result = [dict(entry, email=email)
+                      for (email, _), api_data in zip(credentials, results) for entry in api_data or ()]
+            failed = [email for (email, _), api_data in zip(credentials, results) if not api_data]
+            if failed:
+                logger.error("Extraction failed for %d/%d accounts: %s", len(failed), len(credentials), failed)
+        else:
+            # Run extraction with download support
+            download_dir = os.getenv("DOWNLOAD_DIR", "downloads")
+            extractor = ServiceM8APIExtractor(max_retries=3, download_dir=download_dir)
+            result = extractor.extract()
 
         # Store result in json file
         try:
-            with open("result.json", "w") as f:
-                json.dump(result, f, indent=3)
+            if orjson is not None:
+                buf = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+            else:
+                buf = json.dumps(result, indent=2, ensure_ascii=False).encode()
+            with open("result.json", "wb") as f:
+                f.write(buf)
             logger.info("Results saved to result.json")
         except Exception as e:
-            logger.error(f"Failed to save results to file: {e}")
+            logger.error("Failed to save results to file: %s", e)
 
         if result:
-            response = requests.post(webhook_url, json={"data": result})
+            # 502/503 mean the gateway never reached n8n, so the POST is safe to resend; a 504 may have run the workflow
+            webhook = requests.Session()
+            webhook.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(
+                total=3, backoff_factor=0.5, status_forcelist=(502, 503), allowed_methods=frozenset({"POST"}),
+                raise_on_status=False)))
+            with webhook:
+                response = webhook.post(webhook_url, json={"data": result}, timeout=30)
             if response.status_code == 200:
                 logger.info("Data sent successfully to webhook!")
             else:
-                logger.error(f"Failed to send data to webhook: {response.text}")
+                logger.error("Failed to send data to webhook: %s", response.text)
         else:
             logger.error("No data to send to webhook")
         
         if result:
             logger.info("Extraction completed successfully!")
-            logger.info(f"Found {len(result)} API endpoints")
+            logger.info("Found %d API endpoints", len(result))
             
             
         else:
             logger.error("Extraction failed - no data retrieved")
             
     except Exception as e:
-        logger.error(f"Critical error in main function: {e}")
+        logger.error("Critical error in main function: %s", e)
     finally:
         logger.info("ServiceM8 API Token Extractor finished")
 
@@ -1,39 +1,47 @@
+import gzip
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 
-# Load data from result.json with comprehensive error handling
 try:
-    with open("result.json", "r") as f:
-        api_data = json.load(f)
+    import orjson
+except ImportError:
+    orjson = None
+
+def _load_result(path="result.json"):
+    """Load and validate the extracted endpoints, exiting with a message on the first problem"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both parsers
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except FileNotFoundError:
+        print("❌ Error: result.json file not found!")
+        print("   Make sure the ServiceM8 extraction script has run successfully first.")
+        exit(1)
+    except json.JSONDecodeError as e:
+        print(f"❌ Error: Invalid JSON in result.json file: {e}")
+        print("   The result.json file may be corrupted or incomplete.")
+        exit(1)
+    except Exception as e:
+        print(f"❌ Unexpected error loading result.json: {e}")
+        exit(1)
     
-    # Check if api_data is None or empty
-    if api_data is None:
+    if data is None:
         print("Error: No data found in result.json - file contains null!")
         exit(1)
-    
-    if not api_data:
-        print("Error: No data found in result.json - file is empty or contains empty list!")
+    if not isinstance(data, list):
+        print(f"Error: Expected list format in result.json, but got {type(data).__name__}")
         exit(1)
-    
-    # Check if api_data is a list (expected format)
-    if not isinstance(api_data, list):
-        print(f"Error: Expected list format in result.json, but got {type(api_data).__name__}")
+    if not data:
+        print("Error: No data found in result.json - file is empty or contains empty list!")
         exit(1)
-    
-    print(f"✅ Loaded {len(api_data)} API endpoints from result.json")
-    
-except FileNotFoundError:
-    print("❌ Error: result.json file not found!")
-    print("   Make sure the ServiceM8 extraction script has run successfully first.")
-    exit(1)
-except json.JSONDecodeError as e:
-    print(f"❌ Error: Invalid JSON in result.json file: {e}")
-    print("   The result.json file may be corrupted or incomplete.")
-    exit(1)
-except Exception as e:
-    print(f"❌ Unexpected error loading result.json: {e}")
-    exit(1)
+    return data
+
+api_data = _load_result()
+print(f"✅ Loaded {len(api_data)} API endpoints from result.json")
 
 # Your n8n webhook URL
 webhook_url = "https://n8n.ppmproclean.com.au/webhook/a1877d41-a4a5-47ce-95af-c5134863b1f1"
@@ -49,7 +57,15 @@ print(f"📤 Sending {len(api_data)} ServiceM8 API endpoints to webhook...")
 print(f"🔗 Webhook URL: {webhook_url}")
 
 try:
-    response = requests.post(webhook_url, json=payload, timeout=30)
+    # 502/503 mean the gateway never reached n8n, so the POST is safe to resend; a 504 may have run the workflow
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(
+        total=3, backoff_factor=0.5, status_forcelist=(502, 503), allowed_methods=frozenset({"POST"}),
+        raise_on_status=False)))
+    # The repeated URL templates compress well, n8n inflates gzip request bodies
+    body = orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+    response = session.post(webhook_url, data=gzip.compress(body, compresslevel=6),
+                            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}, timeout=30)
     
     if response.status_code == 200:
         print("✅ Data sent successfully!")